@@ -1,66 +1,62 @@
 import os
-import pandas as pd
-import smtplib
-import bcrypt
-import pymysql
-from datetime import datetime
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_file
+import re
+import csv
+import hashlib
+import hmac
+import io
+import itertools
+import tempfile
+import time
+import uuid
+import click
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from datetime import datetime, timedelta
+from flask import Flask, Blueprint, Response, abort, current_app, g, has_request_context, render_template, request, redirect, url_for, flash, jsonify, send_file, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.dialects.mysql import DATETIME as MYSQL_DATETIME
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.orm import make_transient_to_detached
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 from flask_wtf import FlaskForm, CSRFProtect
 from flask_wtf.file import FileField, FileAllowed
 from wtforms import StringField, PasswordField, SubmitField, IntegerField, TextAreaField, SelectField, FloatField
+from wtforms.widgets import HiddenInput
 from wtforms.validators import DataRequired, Length, Email, NumberRange, ValidationError
 from werkzeug.utils import secure_filename
-from werkzeug.security import generate_password_hash, check_password_hash
-from dotenv import load_dotenv
-import traceback
-
-# Load environment variables
-load_dotenv()
-
-# Initialize Flask app
-app = Flask(__name__)
-
-# Configuration
-app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'abb-store-management-secret-key-2024')
-
-# MySQL Database Configuration
-app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('SQLALCHEMY_DATABASE_URI', 
-    f"mysql+pymysql://{os.getenv('MYSQL_USER', 'root')}:{os.getenv('MYSQL_PASSWORD', '')}@{os.getenv('MYSQL_HOST', 'localhost')}:{os.getenv('MYSQL_PORT', '3306')}/{os.getenv('MYSQL_DB', 'abb_store_management')}")
-
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
-    'pool_pre_ping': True,
-    'pool_recycle': 300,
-    'connect_args': {
-        'charset': 'utf8mb4',
-        'autocommit': True
-    }
-}
-
-app.config['UPLOAD_FOLDER'] = 'uploads'
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
-
-# Email configuration
-app.config['SMTP_SERVER'] = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
-app.config['SMTP_PORT'] = int(os.getenv('SMTP_PORT', 587))
-app.config['SMTP_USERNAME'] = os.getenv('SMTP_USERNAME')
-app.config['SMTP_PASSWORD'] = os.getenv('SMTP_PASSWORD')
-app.config['SMTP_USE_TLS'] = True
+from werkzeug.http import is_resource_modified
+from werkzeug.local import LocalProxy
+from jinja2 import FileSystemBytecodeCache
+from config import config
+from mailer import SMTPConnectionPool, BackgroundWorker, retry_delay
+from cache import LRUCache, create_cache, get_or_set
+from pagination import KeysetPaginator, keyset_condition, query_source
+from migrations import MigrationRegistry, full_scans
+from passwords import PasswordHasher, PasswordHasherBusy
+from metrics import MetricsRegistry
+from profiler import ProfileHistory, RequestProfile
+from archive import ParquetArchive
 
-# Initialize extensions
-db = SQLAlchemy(app)
-login_manager = LoginManager(app)
-login_manager.login_view = 'login'
+# Initialize extensions; they are bound to an app in create_app()
+db = SQLAlchemy()
+login_manager = LoginManager()
+login_manager.login_view = 'main.login'
 login_manager.login_message = 'Please log in to access this page.'
 login_manager.login_message_category = 'info'
-csrf = CSRFProtect(app)
+csrf = CSRFProtect()
+bp = Blueprint('main', __name__, cli_group=None)
 
-# Create upload directory
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+def service(name):
+    """Proxy to a per-app service that create_app() builds from the app's config"""
+    return LocalProxy(lambda: current_app.extensions['abb_store'][name])
+
+cache = service('cache')
+user_cache = service('user_cache')  # per worker: session users by id
+paginator = service('paginator')
+password_hasher = service('password_hasher')
+metrics = service('metrics')
+sql_profiles = service('sql_profiles')  # per worker: recent request SQL profiles
+transaction_archive = service('transaction_archive')
 
 # Models
 class User(UserMixin, db.Model):
@@ -82,10 +78,10 @@ class User(UserMixin, db.Model):
     transactions = db.relationship('Transaction', foreign_keys='Transaction.user_id', lazy=True)
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
     
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
     
     def is_admin(self):
         return self.role == 'admin'
@@ -95,6 +91,11 @@ class User(UserMixin, db.Model):
 
 class Material(db.Model):
     __tablename__ = 'materials'
+    __table_args__ = (
+        db.Index('ix_materials_active_category', 'is_active', 'category', 'current_stock', 'unit_price'),
+        db.Index('ix_materials_active_low', 'is_active', 'low_stock'),
+        db.Index('ix_materials_active_updated', 'is_active', 'last_updated'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     material_number = db.Column(db.String(50), unique=True, nullable=False)
@@ -109,8 +110,11 @@ class Material(db.Model):
     rack_number = db.Column(db.String(20))
     bin_number = db.Column(db.String(20))
     supplier = db.Column(db.String(200))
-    last_updated = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Microseconds on MySQL too: the materials API ETag changes with max(last_updated)
+    last_updated = db.Column(db.DateTime().with_variant(MYSQL_DATETIME(fsp=6), 'mysql', 'mariadb'),
+                             default=datetime.utcnow, onupdate=datetime.utcnow)
     is_active = db.Column(db.Boolean, default=True)
+    low_stock = db.Column(db.Boolean, nullable=False, default=False)  # current_stock <= minimum_stock, kept in step on every write
     
     # Relationships - removed conflicting backref
     material_requests = db.relationship('MaterialRequest', foreign_keys='MaterialRequest.material_id', lazy=True)
@@ -124,8 +128,36 @@ class Material(db.Model):
     def stock_value(self):
         return float(self.current_stock) * float(self.unit_price)
 
+@db.event.listens_for(Material, 'before_insert')
+@db.event.listens_for(Material, 'before_update')
+def set_low_stock_flag(mapper, connection, target):
+    """Keep the stored low_stock flag in step with ORM writes to stock or minimum stock"""
+    state = db.inspect(target)
+    changed = state.attrs.current_stock.history.has_changes() or state.attrs.minimum_stock.history.has_changes()
+    if state.key is not None and not changed:
+        return
+    
+    def value(name):
+        # On insert an unset column takes its default (minimum_stock 10, current_stock 0)
+        current = getattr(target, name)
+        default = Material.__table__.c[name].default
+        if current is None and state.key is None and default is not None and default.is_scalar:
+            current = default.arg
+        return current
+    
+    if state.key is not None and 'current_stock' in state.unloaded:
+        # Stock itself moves through adjust_stock(); compare against the stored value in SQL
+        target.low_stock = Material.current_stock <= value('minimum_stock')
+    else:
+        target.low_stock = float(value('current_stock') or 0) <= float(value('minimum_stock') or 0)
+
 class MaterialRequest(db.Model):
     __tablename__ = 'material_requests'
+    __table_args__ = (
+        db.Index('ix_requests_date_id', 'request_date', 'id'),
+        db.Index('ix_requests_status_date_id', 'status', 'request_date', 'id'),
+        db.Index('ix_requests_user_date_id', 'user_id', 'request_date', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     material_id = db.Column(db.Integer, db.ForeignKey('materials.id'), nullable=False)
@@ -150,6 +182,11 @@ class MaterialRequest(db.Model):
 
 class Transaction(db.Model):
     __tablename__ = 'transactions'
+    __table_args__ = (
+        db.Index('ix_transactions_date_id', 'transaction_date', 'id'),
+        db.Index('ix_transactions_type_date_id', 'transaction_type', 'transaction_date', 'id'),
+        db.Index('ix_transactions_material_date', 'material_id', 'transaction_date'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     material_id = db.Column(db.Integer, db.ForeignKey('materials.id'), nullable=False)
@@ -170,6 +207,68 @@ class Transaction(db.Model):
     def total_value(self):
         return abs(float(self.quantity)) * float(self.unit_price)
 
+class EmailOutbox(db.Model):
+    __tablename__ = 'email_outbox'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    recipient = db.Column(db.String(120), nullable=False)
+    subject = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    status = db.Column(db.Enum('pending', 'sending', 'sent', 'failed', name='outbox_status'), nullable=False, default='pending', index=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    claimed_by = db.Column(db.String(36))
+    claimed_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+
+class TransactionMonthlySummary(db.Model):
+    __tablename__ = 'transaction_monthly_summary'
+    
+    # Rollup of transactions per month/type/category, maintained on every Transaction insert
+    month = db.Column(db.String(7), primary_key=True)  # YYYY-MM
+    transaction_type = db.Column(db.String(20), primary_key=True)
+    category = db.Column(db.String(100), primary_key=True, default='')
+    count = db.Column(db.Integer, nullable=False, default=0)
+    value = db.Column(db.Numeric(16, 2), nullable=False, default=0)
+
+class LowStockAlert(db.Model):
+    __tablename__ = 'low_stock_alerts'
+    
+    # Alert state per material, so the low stock digest only reports changes
+    material_id = db.Column(db.Integer, db.ForeignKey('materials.id'), primary_key=True)
+    is_low = db.Column(db.Boolean, nullable=False, default=True)
+    went_low_at = db.Column(db.DateTime)
+    last_notified_at = db.Column(db.DateTime)
+    recovered_at = db.Column(db.DateTime)
+
+class StockCheckpoint(db.Model):
+    __tablename__ = 'stock_checkpoints'
+    
+    # Ledger balance per material at a month boundary, from every transaction before ``as_of``;
+    # written by build_stock_checkpoints(), materials with a zero balance have no row
+    as_of = db.Column(db.DateTime, primary_key=True)
+    material_id = db.Column(db.Integer, db.ForeignKey('materials.id'), primary_key=True)
+    balance = db.Column(db.Numeric(12, 2), nullable=False)
+
+class TransactionArchiveSummary(db.Model):
+    __tablename__ = 'transaction_archive_summary'
+    
+    # What archive_transactions() moved out of the transactions table, per Parquet file,
+    # type and category; only the files listed here are read back
+    id = db.Column(db.Integer, primary_key=True)
+    month = db.Column(db.String(7), nullable=False, index=True)  # YYYY-MM
+    path = db.Column(db.String(255), nullable=False)  # relative to TRANSACTION_ARCHIVE_DIR
+    transaction_type = db.Column(db.String(20), nullable=False)
+    category = db.Column(db.String(100), nullable=False, default='')
+    count = db.Column(db.Integer, nullable=False)
+    quantity = db.Column(db.Numeric(16, 2), nullable=False)
+    value = db.Column(db.Numeric(16, 2), nullable=False)
+    first_date = db.Column(db.DateTime, nullable=False)
+    last_date = db.Column(db.DateTime, nullable=False)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
 # Forms
 class LoginForm(FlaskForm):
     username = StringField('Username', validators=[DataRequired(), Length(min=3, max=80)])
@@ -221,92 +320,1586 @@ class MaterialForm(FlaskForm):
             raise ValidationError('Material number already exists.')
 
 class MaterialRequestForm(FlaskForm):
-    material_id = SelectField('Material', coerce=int, validators=[DataRequired()])
+    material_id = IntegerField('Material', widget=HiddenInput(), validators=[DataRequired(message='Select a material from the list.')])
+    material_search = StringField('Material')
     quantity_requested = FloatField('Quantity', validators=[DataRequired(), NumberRange(min=0.1)])
     purpose = StringField('Purpose', validators=[DataRequired(), Length(max=200)])
     priority = SelectField('Priority', choices=[('low', 'Low'), ('normal', 'Normal'), ('high', 'High'), ('urgent', 'Urgent')])
     submit = SubmitField('Submit Request')
+    
+    def validate_material_id(self, material_id):
+        material = db.session.get(Material, material_id.data)
+        if not material or not material.is_active:
+            raise ValidationError('Selected material is not available.')
+        self.material = material
 
 class FileUploadForm(FlaskForm):
     file = FileField('Excel File', validators=[DataRequired(), FileAllowed(['xlsx', 'xls'], 'Excel files only!')])
     submit = SubmitField('Upload')
 
 # User loader
+USER_CACHE_COLUMNS = [column.key for column in User.__table__.columns]
+
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    """Load the session user from the per-worker user cache, falling back to a primary key lookup"""
+    values = user_cache.get(int(user_id))
+    if values is None:
+        user = db.session.get(User, int(user_id))
+        if user is not None:
+            user_cache.set(user.id, {column: getattr(user, column) for column in USER_CACHE_COLUMNS},
+                           current_app.config['USER_CACHE_TTL'])
+    else:
+        # Rebuild a persistent User from the cached row without a round trip
+        user = User(**values)
+        make_transient_to_detached(user)
+        user = db.session.merge(user, load=False)
+    
+    # Deactivated users lose access as soon as their cache entry is dropped or expires
+    if user is None or not user.is_active:
+        return None
+    return user
+
+@db.event.listens_for(db.session, 'after_flush')
+def track_user_changes(session, flush_context):
+    user_ids = {obj.id for obj in (*session.dirty, *session.deleted) if isinstance(obj, User)}
+    if user_ids and session.info.get('changed_users', set()) is not None:
+        session.info.setdefault('changed_users', set()).update(user_ids)
+
+@db.event.listens_for(db.session, 'do_orm_execute')
+def track_bulk_user_changes(orm_execute_state):
+    mapper = orm_execute_state.bind_mapper
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) and mapper is not None and mapper.class_ is User:
+        # The affected ids are unknown, so the whole user cache goes
+        orm_execute_state.session.info['changed_users'] = None
+
+@db.event.listens_for(db.session, 'after_commit')
+def invalidate_cached_users(session):
+    if 'changed_users' in session.info:
+        user_ids = session.info.pop('changed_users')
+        if user_ids is None:
+            user_cache.clear()
+        else:
+            user_cache.delete(*user_ids)
+
+@db.event.listens_for(db.session, 'after_rollback')
+def discard_changed_users(session):
+    session.info.pop('changed_users', None)
 
 # Utility functions
-def send_email(to_email, subject, body):
-    """Send email notification"""
-    try:
-        msg = MIMEMultipart()
-        msg['From'] = app.config['SMTP_USERNAME']
-        msg['To'] = to_email
-        msg['Subject'] = subject
-        msg.attach(MIMEText(body, 'plain'))
+smtp_pool = service('smtp_pool')
+
+def queue_email(to_email, subject, body):
+    """Add an email to the outbox as part of the caller's DB transaction"""
+    db.session.add(EmailOutbox(recipient=to_email, subject=subject, body=body))
+    db.session.info['outbox_pending'] = True
+
+@db.event.listens_for(db.session, 'after_commit')
+def wake_outbox_worker(session):
+    if session.info.pop('outbox_pending', False):
+        outbox_worker.wake()
+
+def drain_outbox():
+    """Claim due outbox messages, send them over pooled SMTP sessions and record the outcome.
+
+    Returns the number of messages claimed in this pass.
+    """
+    now = datetime.utcnow()
+    token = str(uuid.uuid4())
+    stale = now - timedelta(seconds=current_app.config['OUTBOX_CLAIM_TIMEOUT'])
+    
+    due_ids = [row.id for row in db.session.query(EmailOutbox.id).filter(
+        db.or_(
+            db.and_(EmailOutbox.status == 'pending', EmailOutbox.next_attempt_at <= now),
+            db.and_(EmailOutbox.status == 'sending', EmailOutbox.claimed_at < stale)
+        )
+    ).order_by(EmailOutbox.id).limit(current_app.config['OUTBOX_BATCH_SIZE'])]
+    
+    if not due_ids:
+        return 0
+    
+    # Conditional claim so concurrent workers never send the same message twice
+    db.session.query(EmailOutbox).filter(
+        EmailOutbox.id.in_(due_ids),
+        db.or_(EmailOutbox.status == 'pending', EmailOutbox.claimed_at < stale)
+    ).update({
+        EmailOutbox.status: 'sending',
+        EmailOutbox.claimed_by: token,
+        EmailOutbox.claimed_at: now,
+        EmailOutbox.attempts: EmailOutbox.attempts + 1
+    }, synchronize_session=False)
+    db.session.commit()
+    
+    messages = EmailOutbox.query.filter_by(claimed_by=token, status='sending').all()
+    sender = current_app.config['SMTP_USERNAME']
+    pool = smtp_pool._get_current_object()  # the sender threads have no app context
+    
+    def deliver(message):
+        try:
+            pool.send(sender, message.recipient, message.subject, message.body)
+            return None
+        except Exception as e:
+            return str(e)
+    
+    with ThreadPoolExecutor(max_workers=current_app.config['OUTBOX_POOL_SIZE']) as executor:
+        outcomes = list(executor.map(deliver, messages))
+    
+    for message, error in zip(messages, outcomes):
+        message.claimed_by = None
+        if error is None:
+            message.status = 'sent'
+            message.sent_at = datetime.utcnow()
+            message.last_error = None
+        elif message.attempts >= current_app.config['OUTBOX_MAX_ATTEMPTS']:
+            message.status = 'failed'
+            message.last_error = error
+            current_app.logger.error(f"Email to {message.recipient} failed permanently: {error}")
+        else:
+            delay = retry_delay(message.attempts, current_app.config['OUTBOX_RETRY_BASE'], current_app.config['OUTBOX_RETRY_CAP'])
+            message.status = 'pending'
+            message.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+            message.last_error = error
+            current_app.logger.warning(f"Email to {message.recipient} failed (attempt {message.attempts}), retrying in {delay}s: {error}")
+        metrics.inc('abb_store_emails_total', status=message.status)
+    
+    db.session.commit()
+    return len(messages)
+
+def run_outbox_worker(app):
+    with app.app_context():
+        try:
+            # Keep draining while full batches are being claimed
+            while drain_outbox() >= current_app.config['OUTBOX_BATCH_SIZE']:
+                pass
+            metrics.inc('abb_store_jobs_total', job='outbox', outcome='ok')
+        except Exception as e:
+            db.session.rollback()
+            metrics.inc('abb_store_jobs_total', job='outbox', outcome='error')
+            current_app.logger.error(f"Outbox worker error: {str(e)}")
+
+outbox_worker = service('outbox_worker')
+
+@bp.before_app_request
+def start_outbox_worker():
+    if current_app.config['OUTBOX_WORKER_ENABLED'] and not outbox_worker.is_alive():
+        outbox_worker.start()
+
+@bp.cli.command('send-outbox')
+def send_outbox_command():
+    """Deliver all due outbox emails once and exit (for cron or serverless deployments)."""
+    total = 0
+    while True:
+        claimed = drain_outbox()
+        total += claimed
+        if claimed < current_app.config['OUTBOX_BATCH_SIZE']:
+            break
+    print(f"Processed {total} outbox message(s)")
+
+def send_low_stock_alerts():
+    """Email managers one digest of materials that went low or recovered since the last run.
+
+    Alert state per material is kept in low_stock_alerts, so an unchanged low
+    stock list sends nothing. Returns (went_low, recovered) counts.
+    """
+    now = datetime.utcnow()
+    low_ids = {row.id for row in db.session.query(Material.id).filter(
+        Material.low_stock == True,
+        Material.is_active == True
+    )}
+    # Locked so two workers running the digest at once cannot both report a change
+    states = {state.material_id: state for state in LowStockAlert.query.with_for_update()}
+    
+    went_low = [material_id for material_id in low_ids if material_id not in states or not states[material_id].is_low]
+    recovered = [material_id for material_id, state in states.items() if state.is_low and material_id not in low_ids]
+    if not went_low and not recovered:
+        db.session.commit()
+        return 0, 0
+    
+    for material_id in went_low:
+        state = states.get(material_id) or LowStockAlert(material_id=material_id)
+        state.is_low = True
+        state.went_low_at = now
+        state.recovered_at = None
+        state.last_notified_at = now
+        db.session.add(state)
+    
+    for material_id in recovered:
+        states[material_id].is_low = False
+        states[material_id].recovered_at = now
+        states[material_id].last_notified_at = now
+    
+    materials = Material.query.filter(Material.id.in_(went_low + recovered)).order_by(Material.material_number).all()
+    newly_low = [material for material in materials if material.id in low_ids]
+    # Deactivated materials leave the low list silently
+    restocked = [material for material in materials if material.id not in low_ids and material.is_active]
+    
+    if newly_low or restocked:
+        # Rendered once and queued to every manager
+        subject = f"ABB Store Management - Low Stock Digest ({len(newly_low)} new, {len(restocked)} recovered)"
+        body = ""
+        if newly_low:
+            body += "The following materials have dropped to or below minimum stock:\n\n"
+            for material in newly_low:
+                body += f"• {material.material_number} - {material.description}\n"
+                body += f"  Current Stock: {material.current_stock} {material.unit}\n"
+                body += f"  Minimum Stock: {material.minimum_stock} {material.unit}\n"
+                body += f"  Location: {material.location or 'Not specified'}\n\n"
+            body += "Please take necessary action to replenish the stock.\n\n"
+        if restocked:
+            body += "The following materials are back above minimum stock:\n\n"
+            for material in restocked:
+                body += f"• {material.material_number} - {material.description}\n"
+                body += f"  Current Stock: {material.current_stock} {material.unit}\n\n"
+        body += "Best regards,\nABB Store Management System"
         
-        server = smtplib.SMTP(app.config['SMTP_SERVER'], app.config['SMTP_PORT'])
-        server.starttls()
-        server.login(app.config['SMTP_USERNAME'], app.config['SMTP_PASSWORD'])
-        server.sendmail(app.config['SMTP_USERNAME'], to_email, msg.as_string())
-        server.quit()
-        return True
+        managers = User.query.filter(User.role.in_(['admin', 'manager']), User.is_active == True).all()
+        for manager in managers:
+            queue_email(manager.email, subject, body)
+    
+    db.session.commit()
+    return len(newly_low), len(restocked)
+
+def run_low_stock_digest(app):
+    with app.app_context():
+        try:
+            went_low, recovered = send_low_stock_alerts()
+            if went_low or recovered:
+                current_app.logger.info(f"Low stock digest queued: {went_low} new, {recovered} recovered")
+            metrics.inc('abb_store_jobs_total', job='low_stock_digest', outcome='ok')
+        except Exception as e:
+            db.session.rollback()
+            metrics.inc('abb_store_jobs_total', job='low_stock_digest', outcome='error')
+            current_app.logger.error(f"Low stock digest error: {str(e)}")
+
+low_stock_worker = service('low_stock_worker')
+
+@bp.before_app_request
+def start_low_stock_worker():
+    if current_app.config['LOW_STOCK_WORKER_ENABLED'] and not low_stock_worker.is_alive():
+        low_stock_worker.start()
+
+@bp.cli.command('low-stock-digest')
+def low_stock_digest_command():
+    """Queue the low stock digest once and exit (for cron or serverless deployments)."""
+    went_low, recovered = send_low_stock_alerts()
+    print(f"Low stock digest: {went_low} new, {recovered} recovered")
+
+def adjust_stock(material, quantity):
+    """Add ``quantity`` to a material's stock (negative to take stock out) in one conditional UPDATE.
+
+    The availability check and the write are the same statement, so two
+    concurrent issues cannot both pass the check and drive stock negative,
+    and no row lock is held beyond the caller's short transaction. Returns
+    False, leaving stock untouched, when there is not enough on hand.
+    """
+    criteria = [Material.id == material.id]
+    if quantity < 0:
+        criteria.append(Material.current_stock >= -quantity)
+    
+    statement = db.update(Material).where(*criteria).ordered_values(
+        # Assigned first: MySQL applies SET clauses left to right, so this still sees the old stock
+        (Material.low_stock, Material.current_stock + quantity <= Material.minimum_stock),
+        (Material.current_stock, Material.current_stock + quantity),
+        (Material.last_updated, datetime.utcnow())
+    ).execution_options(synchronize_session=False)
+    updated = db.session.execute(statement).rowcount
+    
+    # Reload the new stock level on next access instead of trusting the stale copy
+    db.session.expire(material, ['current_stock', 'low_stock', 'last_updated'])
+    return updated == 1
+
+def import_material_rows(records, offset, user_id):
+    """Upsert one chunk of uploaded material rows using set-based statements.
+
+    Existing materials are looked up with a single IN query, new materials are
+    bulk inserted, changed materials are bulk updated by primary key and the
+    matching stock transactions are bulk inserted. If the chunk's writes fail,
+    its savepoint is rolled back and the rows are imported again one by one,
+    so only the rows that fail themselves are counted and logged as errors.
+    Returns (success, errors).
+    """
+    numbers = {row.get('material_number') for row in records}
+    existing = {
+        material.material_number: material
+        for material in db.session.query(
+            Material.id, Material.material_number, Material.current_stock, Material.category,
+            Material.unit, Material.minimum_stock, Material.unit_price, Material.location
+        ).filter(Material.material_number.in_(numbers))
+    }
+    
+    now = datetime.utcnow()
+    inserts = {}
+    initial_stock = {}  # new material number -> (stock, unit price) of its first row
+    updates = {}
+    adjustments = []
+    new_adjustments = []  # (material number, adjustment) for new materials listed again; ids are known after the insert
+    success_count = 0
+    error_count = 0
+    
+    for index, row in enumerate(records, start=offset):
+        try:
+            material_number = row['material_number']
+            material = existing.get(material_number)
+            
+            if material_number in inserts:
+                # Same new material listed again further down the sheet
+                values = inserts[material_number]
+                old_stock = values['current_stock']
+                values.update(
+                    description=row['description'],
+                    category=row.get('category', values['category']),
+                    unit=row.get('unit', values['unit']),
+                    current_stock=float(row['current_stock']),
+                    minimum_stock=float(row.get('minimum_stock', values['minimum_stock'])),
+                    unit_price=float(row.get('unit_price', values['unit_price'])),
+                    location=row.get('location', values['location'])
+                )
+                
+                # Log stock adjustment, as for an existing material
+                if old_stock != values['current_stock']:
+                    new_adjustments.append((material_number, {
+                        'user_id': user_id,
+                        'transaction_type': 'adjust',
+                        'quantity': values['current_stock'] - old_stock,
+                        'unit_price': values['unit_price'],
+                        'purpose': 'Bulk upload adjustment',
+                        'remarks': 'Stock updated via Excel upload',
+                        'transaction_date': now
+                    }))
+            elif material:
+                # Update existing material
+                previous = updates.get(material.id)
+                old_stock = float(previous['current_stock'] if previous else material.current_stock)
+                values = {
+                    'id': material.id,
+                    'current_stock': float(row['current_stock']),
+                    'description': row['description'],
+                    'category': row.get('category', material.category),
+                    'unit': row.get('unit', material.unit),
+                    'minimum_stock': float(row.get('minimum_stock', material.minimum_stock)),
+                    'unit_price': float(row.get('unit_price', material.unit_price)),
+                    'location': row.get('location', material.location),
+                    'last_updated': now
+                }
+                updates[material.id] = values
+                
+                # Log stock adjustment
+                if old_stock != values['current_stock']:
+                    adjustments.append({
+                        'material_id': material.id,
+                        'user_id': user_id,
+                        'transaction_type': 'adjust',
+                        'quantity': values['current_stock'] - old_stock,
+                        'unit_price': values['unit_price'],
+                        'purpose': 'Bulk upload adjustment',
+                        'remarks': 'Stock updated via Excel upload',
+                        'transaction_date': now
+                    })
+            else:
+                # Create new material
+                inserts[material_number] = {
+                    'material_number': material_number,
+                    'description': row['description'],
+                    'category': row.get('category', ''),
+                    'unit': row.get('unit', 'PCS'),
+                    'current_stock': float(row['current_stock']),
+                    'minimum_stock': float(row.get('minimum_stock', 10)),
+                    'unit_price': float(row.get('unit_price', 0)),
+                    'location': row.get('location', ''),
+                    'last_updated': now
+                }
+                initial_stock[material_number] = (inserts[material_number]['current_stock'], inserts[material_number]['unit_price'])
+            
+            success_count += 1
+            
+        except Exception as e:
+            error_count += 1
+            current_app.logger.error(f"Error processing row {index}: {str(e)}")
+    
+    for values in list(inserts.values()) + list(updates.values()):
+        values['low_stock'] = values['current_stock'] <= values['minimum_stock']
+    
+    try:
+        with db.session.begin_nested():
+            if inserts:
+                db.session.execute(db.insert(Material), list(inserts.values()))
+                new_ids = dict(db.session.query(Material.material_number, Material.id).filter(
+                    Material.material_number.in_(list(inserts))
+                ))
+                
+                # Log initial stock, then the adjustments of any later rows for the same material
+                adjustments.extend({
+                    'material_id': new_ids[material_number],
+                    'user_id': user_id,
+                    'transaction_type': 'receive',
+                    'quantity': stock,
+                    'unit_price': unit_price,
+                    'purpose': 'Initial stock via upload',
+                    'remarks': 'Material added via Excel upload',
+                    'transaction_date': now
+                } for material_number, (stock, unit_price) in initial_stock.items())
+                adjustments.extend(
+                    {'material_id': new_ids[material_number], **adjustment} for material_number, adjustment in new_adjustments
+                )
+            
+            if updates:
+                db.session.execute(db.update(Material), list(updates.values()))
+            
+            if adjustments:
+                db.session.execute(db.insert(Transaction), adjustments)
     except Exception as e:
-        app.logger.error(f"Email sending failed: {str(e)}")
-        return False
+        if len(records) == 1:
+            current_app.logger.error(f"Error writing row {offset}: {str(e)}")
+            return 0, 1
+        current_app.logger.warning(f"Error writing rows {offset}-{offset + len(records) - 1}, retrying row by row: {str(e)}")
+        results = [import_material_rows([row], index, user_id) for index, row in enumerate(records, start=offset)]
+        return sum(success for success, _ in results), sum(errors for _, errors in results)
+    
+    return success_count, error_count
 
-def send_low_stock_alerts():
-    """Send low stock alerts to managers and admins"""
+# Cache invalidation: cached keys are dropped after a commit that wrote to any of their tables
+CACHE_DEPENDENCIES = {
+    'dashboard:stats': {'materials', 'material_requests', 'transactions'},
+}
+
+def record_changed_tables(session, tables):
+    session.info.setdefault('changed_tables', set()).update(tables)
+
+@db.event.listens_for(db.session, 'after_flush')
+def track_flushed_changes(session, flush_context):
+    record_changed_tables(session, {
+        obj.__table__.name for obj in (*session.new, *session.dirty, *session.deleted)
+        if hasattr(obj, '__table__')
+    })
+
+@db.event.listens_for(db.session, 'do_orm_execute')
+def track_bulk_changes(orm_execute_state):
+    # Bulk insert/update/delete statements bypass the flush
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None:
+            record_changed_tables(orm_execute_state.session, {mapper.local_table.name})
+
+@db.event.listens_for(db.session, 'after_commit')
+def invalidate_cached_queries(session):
+    changed = session.info.pop('changed_tables', None)
+    if changed:
+        stale = [key for key, tables in CACHE_DEPENDENCIES.items() if tables & changed]
+        if stale:
+            cache.delete(*stale)
+
+@db.event.listens_for(db.session, 'after_rollback')
+def discard_changed_tables(session):
+    session.info.pop('changed_tables', None)
+
+# Monthly transaction rollup
+def upsert_transaction_rollup(connection, deltas):
+    """Add (count, value) deltas keyed by (month, transaction_type, category) to the rollup table"""
+    table = TransactionMonthlySummary.__table__
+    values = [
+        {'month': month, 'transaction_type': transaction_type, 'category': category, 'count': count, 'value': value}
+        for (month, transaction_type, category), (count, value) in deltas.items()
+    ]
+    if not values:
+        return
+    
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+        statement = insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.month, table.c.transaction_type, table.c.category],
+            set_={'count': table.c.count + statement.excluded['count'], 'value': table.c.value + statement.excluded.value}
+        )
+        connection.execute(statement, values)
+    elif dialect in ('mysql', 'mariadb'):
+        from sqlalchemy.dialects.mysql import insert
+        statement = insert(table)
+        statement = statement.on_duplicate_key_update(
+            count=table.c.count + statement.inserted['count'],
+            value=table.c.value + statement.inserted.value
+        )
+        connection.execute(statement, values)
+    else:
+        for row in values:
+            key = db.and_(table.c.month == row['month'], table.c.transaction_type == row['transaction_type'],
+                          table.c.category == row['category'])
+            result = connection.execute(table.update().where(key).values(
+                count=table.c.count + row['count'], value=table.c.value + row['value']
+            ))
+            if result.rowcount == 0:
+                connection.execute(table.insert().values(**row))
+
+def apply_transaction_rollup(connection, rows):
+    """Fold newly inserted transactions (dicts of column values) into the monthly rollup"""
+    material_ids = {row['material_id'] for row in rows}
+    categories = dict(connection.execute(
+        db.select(Material.id, Material.category).where(Material.id.in_(material_ids))
+    ).all())
+    
+    deltas = {}
+    for row in rows:
+        transaction_date = row.get('transaction_date') or datetime.utcnow()
+        key = (transaction_date.strftime('%Y-%m'), row['transaction_type'], categories.get(row['material_id']) or '')
+        count, value = deltas.get(key, (0, 0.0))
+        deltas[key] = (count + 1, value + float(row['quantity']) * float(row.get('unit_price') or 0))
+    
+    upsert_transaction_rollup(connection, deltas)
+
+@db.event.listens_for(db.session, 'after_flush')
+def rollup_flushed_transactions(session, flush_context):
+    rows = [
+        {column: getattr(obj, column) for column in ('material_id', 'transaction_type', 'quantity', 'unit_price', 'transaction_date')}
+        for obj in session.new if isinstance(obj, Transaction)
+    ]
+    if rows:
+        apply_transaction_rollup(session.connection(), rows)
+
+@db.event.listens_for(db.session, 'do_orm_execute')
+def rollup_bulk_transactions(orm_execute_state):
+    mapper = orm_execute_state.bind_mapper
+    if orm_execute_state.is_insert and mapper is not None and mapper.class_ is Transaction:
+        rows = orm_execute_state.parameters
+        if isinstance(rows, dict):
+            rows = [rows]
+        if rows:
+            apply_transaction_rollup(orm_execute_state.session.connection(), rows)
+
+def rebuild_transaction_rollup(connection):
+    """Recompute the monthly rollup from the transactions table plus the archived months' summaries"""
+    year = db.extract('year', Transaction.transaction_date)
+    month = db.extract('month', Transaction.transaction_date)
+    totals = connection.execute(db.select(
+        year, month, Transaction.transaction_type, Material.category,
+        db.func.count(Transaction.id), db.func.sum(Transaction.quantity * Transaction.unit_price)
+    ).join(Material, Transaction.material_id == Material.id).group_by(
+        year, month, Transaction.transaction_type, Material.category
+    ))
+    
+    deltas = {}
+    for row_year, row_month, transaction_type, category, count, value in totals:
+        key = (f"{int(row_year):04d}-{int(row_month):02d}", transaction_type, category or '')
+        previous_count, previous_value = deltas.get(key, (0, 0.0))
+        deltas[key] = (previous_count + count, previous_value + float(value or 0))
+    
+    # Archived months only survive in their summaries (the table is absent while migration 2 runs)
+    if db.inspect(connection).has_table(TransactionArchiveSummary.__tablename__):
+        archived = connection.execute(db.select(
+            TransactionArchiveSummary.month, TransactionArchiveSummary.transaction_type, TransactionArchiveSummary.category,
+            db.func.sum(TransactionArchiveSummary.count), db.func.sum(TransactionArchiveSummary.value)
+        ).group_by(
+            TransactionArchiveSummary.month, TransactionArchiveSummary.transaction_type, TransactionArchiveSummary.category
+        ))
+        for month, transaction_type, category, count, value in archived:
+            previous_count, previous_value = deltas.get((month, transaction_type, category), (0, 0.0))
+            deltas[(month, transaction_type, category)] = (previous_count + count, previous_value + float(value or 0))
+    
+    connection.execute(TransactionMonthlySummary.__table__.delete())
+    upsert_transaction_rollup(connection, deltas)
+    return len(deltas)
+
+@bp.cli.command('rebuild-rollup')
+def rebuild_rollup_command():
+    """Backfill the monthly transaction rollup from the transactions table."""
+    with db.engine.begin() as connection:
+        print(f"Rebuilt {rebuild_transaction_rollup(connection)} monthly rollup row(s)")
+
+# Point-in-time stock: month-end checkpoints plus the transactions since the nearest one
+def month_start(moment):
+    return datetime(moment.year, moment.month, 1)
+
+def next_month_start(moment):
+    return datetime(moment.year + moment.month // 12, moment.month % 12 + 1, 1)
+
+def build_stock_checkpoints(connection, until=None):
+    """Checkpoint every month boundary after the latest one, up to the start of ``until``'s month.
+
+    Only closed months are checkpointed (by default, everything before the
+    current month), so new transactions never land behind a checkpoint. Each
+    boundary is one INSERT ... SELECT adding the month's transactions to the
+    previous boundary's balances. Returns the boundaries written.
+    """
+    table = StockCheckpoint.__table__
+    until = month_start(until or datetime.utcnow())
+    previous = connection.execute(db.select(db.func.max(table.c.as_of))).scalar()
+    if previous is None:
+        first = connection.execute(db.select(db.func.min(Transaction.transaction_date))).scalar()
+        if first is None:
+            return []
+        boundary = next_month_start(first)
+    else:
+        boundary = next_month_start(previous)
+    
+    written = []
+    while boundary <= until:
+        movements = db.select(Transaction.material_id, Transaction.quantity).where(Transaction.transaction_date < boundary)
+        if previous is not None:
+            movements = movements.where(Transaction.transaction_date >= previous).union_all(
+                db.select(table.c.material_id, table.c.balance).where(table.c.as_of == previous)
+            )
+        movements = movements.subquery()
+        balance = db.func.sum(movements.c.quantity)
+        connection.execute(table.insert().from_select(
+            ['as_of', 'material_id', 'balance'],
+            db.select(db.literal(boundary, db.DateTime), movements.c.material_id, balance)
+            .group_by(movements.c.material_id).having(balance != 0)
+        ))
+        written.append(boundary)
+        previous, boundary = boundary, next_month_start(boundary)
+    return written
+
+def stock_as_of_column(moment):
+    """Per-material stock at ``moment`` (every transaction before it), for selects from materials.
+
+    The latest checkpoint at or before ``moment`` supplies the balance and only
+    the transactions since are summed; both are correlated subqueries served by
+    index seeks, so the cost follows the rows selected. Returns (column, checkpoint).
+    """
+    checkpoint = db.session.query(db.func.max(StockCheckpoint.as_of)).filter(StockCheckpoint.as_of <= moment).scalar()
+    replayed = db.select(db.func.sum(Transaction.quantity)).where(
+        Transaction.material_id == Material.id, Transaction.transaction_date < moment
+    )
+    balance = 0
+    if checkpoint is not None:
+        replayed = replayed.where(Transaction.transaction_date >= checkpoint)
+        balance = db.func.coalesce(db.select(StockCheckpoint.balance).where(
+            StockCheckpoint.as_of == checkpoint, StockCheckpoint.material_id == Material.id
+        ).scalar_subquery(), 0)
+    return (balance + db.func.coalesce(replayed.scalar_subquery(), 0)).label('stock_as_of'), checkpoint
+
+@bp.cli.command('build-stock-checkpoints')
+def build_stock_checkpoints_command():
+    """Checkpoint per-material stock at each closed month boundary not checkpointed yet (run monthly)."""
+    with db.engine.begin() as connection:
+        written = build_stock_checkpoints(connection)
+    if written:
+        print(f"Wrote stock checkpoints for {len(written)} month(s), {written[0]:%Y-%m-%d} to {written[-1]:%Y-%m-%d}")
+    else:
+        print("Stock checkpoints are up to date")
+
+# Transaction archive: whole months past the horizon move from the transactions table to Parquet
+def archive_month_filters(start=None, end=None):
+    """Criteria on TransactionArchiveSummary for the months overlapping [start, end)"""
+    criteria = []
+    if start is not None:
+        criteria.append(TransactionArchiveSummary.month >= f'{start:%Y-%m}')
+    if end is not None:
+        criteria.append(TransactionArchiveSummary.month <= f'{end - timedelta(microseconds=1):%Y-%m}')
+    return criteria
+
+def archived_index(transaction_type='', start=None, end=None):
+    """([(month, archive paths)] newest first, archived transactions) for the months overlapping [start, end).
+
+    One query on the summaries, so a list page costs the same whether or not it reaches the archive.
+    """
+    criteria = archive_month_filters(start, end)
+    if transaction_type:
+        criteria.append(TransactionArchiveSummary.transaction_type == transaction_type)
+    rows = db.session.query(
+        TransactionArchiveSummary.month, TransactionArchiveSummary.path, db.func.sum(TransactionArchiveSummary.count)
+    ).filter(*criteria).group_by(
+        TransactionArchiveSummary.month, TransactionArchiveSummary.path
+    ).order_by(TransactionArchiveSummary.month.desc(), TransactionArchiveSummary.path)
+    
+    months = {}
+    archived = 0
+    for month, path, count in rows:
+        months.setdefault(month, []).append(path)
+        archived += count
+    return list(months.items()), archived
+
+def archived_months(start=None, end=None):
+    """[(month, archive paths)] for the archived months overlapping [start, end), newest first"""
+    return archived_index(start=start, end=end)[0]
+
+def archived_transaction(row):
+    """An archived row shaped like a Transaction for the templates and transaction_to_dict()"""
+    return SimpleNamespace(
+        id=row['id'],
+        material_id=row['material_id'],
+        user_id=row['user_id'],
+        transaction_type=row['transaction_type'],
+        quantity=row['quantity'],
+        unit_price=row['unit_price'],
+        reference_number=row['reference_number'],
+        purpose=row['purpose'],
+        transaction_date=row['transaction_date'],
+        remarks=row['remarks'],
+        total_value=abs(float(row['quantity'])) * float(row['unit_price'] or 0),
+        material=SimpleNamespace(material_number=row['material_number'], description=row['description'], unit=row['unit']),
+        user=SimpleNamespace(username=row['username']),
+        archived=True
+    )
+
+def archived_transactions_source(months, transaction_type='', start=None, end=None):
+    """A paginate_sources() source over the archived ``months``; files are only read when a page reaches them"""
+    def fetch(values, newer, limit):
+        if not months:
+            return []
+        rows = transaction_archive.page(months, values, newer, limit, start=start, end=end, transaction_type=transaction_type)
+        return [archived_transaction(row) for row in rows]
+    
+    return fetch
+
+def archived_movements(start, end):
+    """Net archived quantity per material id over [start, end); a start of None means from the beginning"""
+    if start is not None and start >= end:
+        return {}
+    paths = [path for _, month_paths in archived_months(start, end) for path in month_paths]
+    if not paths:
+        return {}
+    return transaction_archive.net_quantities(paths, start, end)
+
+def archive_month(month, end):
+    """Move the transactions dated [month, end) to one Parquet file and summary rows; returns the count.
+
+    The file is written, the rows deleted and the summaries inserted in one
+    database transaction; if any step fails the file is removed again.
+    """
+    label = f'{month:%Y-%m}'
+    in_month = db.and_(Transaction.transaction_date >= month, Transaction.transaction_date < end)
+    category = db.func.coalesce(Material.category, '')
+    path = None
+    try:
+        with db.engine.begin() as connection:
+            summaries = connection.execute(db.select(
+                Transaction.transaction_type, category, db.func.count(Transaction.id),
+                db.func.sum(Transaction.quantity), db.func.sum(Transaction.quantity * Transaction.unit_price),
+                db.func.min(Transaction.transaction_date), db.func.max(Transaction.transaction_date)
+            ).outerjoin(Material, Transaction.material_id == Material.id).where(in_month).group_by(
+                Transaction.transaction_type, category
+            )).all()
+            expected = sum(row[2] for row in summaries)
+            if not expected:
+                return 0
+            
+            rows = connection.execute(db.select(
+                Transaction.id, Transaction.transaction_date, Transaction.material_id, Material.material_number,
+                Material.description, Material.category, Material.unit, Transaction.transaction_type,
+                Transaction.quantity, Transaction.unit_price, Transaction.user_id, User.username,
+                Transaction.reference_number, Transaction.purpose, Transaction.remarks
+            ).outerjoin(
+                Material, Transaction.material_id == Material.id
+            ).outerjoin(
+                User, Transaction.user_id == User.id
+            ).where(in_month).order_by(Transaction.transaction_date, Transaction.id).execution_options(
+                stream_results=True, yield_per=current_app.config['EXPORT_BATCH_SIZE']
+            ))
+            path, written = transaction_archive.write(label, ([row._asdict() for row in batch] for batch in rows.partitions()))
+            deleted = connection.execute(Transaction.__table__.delete().where(in_month)).rowcount
+            if written != expected or deleted != expected:
+                raise RuntimeError(f"{label}: {expected} transactions counted, {written} archived, {deleted} deleted")
+            
+            connection.execute(TransactionArchiveSummary.__table__.insert(), [
+                {'month': label, 'path': path, 'transaction_type': transaction_type, 'category': row_category,
+                 'count': count, 'quantity': quantity or 0, 'value': value or 0, 'first_date': first, 'last_date': last}
+                for transaction_type, row_category, count, quantity, value, first, last in summaries
+            ])
+    except Exception:
+        if path is not None:
+            transaction_archive.remove(path)
+        raise
+    return expected
+
+def archive_transactions(horizon_days):
+    """Archive every whole month older than ``horizon_days``, one database transaction per month.
+
+    Stock checkpoints are brought up to date first: later checkpoints are built
+    from the transactions table alone, so they must already cover the archived
+    months. Returns {month: transactions archived}.
+    """
+    cutoff = month_start(datetime.utcnow() - timedelta(days=horizon_days))
+    with db.engine.begin() as connection:
+        build_stock_checkpoints(connection)
+        first = connection.execute(db.select(db.func.min(Transaction.transaction_date))).scalar()
+    
+    archived = {}
+    month = month_start(first) if first is not None else cutoff
+    while month < cutoff:
+        archived[f'{month:%Y-%m}'] = archive_month(month, next_month_start(month))
+        month = next_month_start(month)
+    return archived
+
+@bp.cli.command('archive-transactions')
+@click.option('--horizon-days', type=int, default=None,
+              help='Archive whole months older than this many days (default TRANSACTION_ARCHIVE_HORIZON_DAYS)')
+def archive_transactions_command(horizon_days):
+    """Move transactions older than the archive horizon to Parquet files, a month at a time."""
+    if horizon_days is None:
+        horizon_days = current_app.config['TRANSACTION_ARCHIVE_HORIZON_DAYS']
+    archived = {month: count for month, count in archive_transactions(horizon_days).items() if count}
+    if archived:
+        print(f"Archived {sum(archived.values()):,} transaction(s) from {len(archived)} month(s), "
+              f"{min(archived)} to {max(archived)}, into {current_app.config['TRANSACTION_ARCHIVE_DIR']}")
+    else:
+        print(f"No transactions older than {horizon_days} days to archive")
+
+# Material full-text search
+# FTS5 on SQLite, a FULLTEXT index on MySQL, LIKE scans when neither is set up
+SEARCH_COLUMNS = ['material_number', 'description', 'category', 'supplier']
+SEARCH_WEIGHTS = [10.0, 1.0, 2.0, 1.0]  # bm25 column weights, a material number hit ranks highest
+
+SQLITE_SEARCH_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS materials_fts USING fts5(
+        {', '.join(SEARCH_COLUMNS)}, content='materials', content_rowid='id', prefix='2 3 4'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS materials_fts_ai AFTER INSERT ON materials BEGIN
+        INSERT INTO materials_fts(rowid, {', '.join(SEARCH_COLUMNS)})
+        VALUES (new.id, {', '.join('new.' + c for c in SEARCH_COLUMNS)});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS materials_fts_ad AFTER DELETE ON materials BEGIN
+        INSERT INTO materials_fts(materials_fts, rowid, {', '.join(SEARCH_COLUMNS)})
+        VALUES ('delete', old.id, {', '.join('old.' + c for c in SEARCH_COLUMNS)});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS materials_fts_au AFTER UPDATE OF {', '.join(SEARCH_COLUMNS)} ON materials BEGIN
+        INSERT INTO materials_fts(materials_fts, rowid, {', '.join(SEARCH_COLUMNS)})
+        VALUES ('delete', old.id, {', '.join('old.' + c for c in SEARCH_COLUMNS)});
+        INSERT INTO materials_fts(rowid, {', '.join(SEARCH_COLUMNS)})
+        VALUES (new.id, {', '.join('new.' + c for c in SEARCH_COLUMNS)});
+    END"""
+]
+
+search_backends = {}
+
+def search_backend():
+    """Return 'fts5', 'fulltext' or 'like' depending on which search index exists"""
+    engine = db.engine
+    if engine.url not in search_backends:
+        backend = 'like'
+        if engine.dialect.name == 'sqlite':
+            with engine.connect() as connection:
+                if connection.execute(db.text(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'materials_fts'"
+                )).first():
+                    backend = 'fts5'
+        elif engine.dialect.name in ('mysql', 'mariadb'):
+            indexes = db.inspect(engine).get_indexes('materials')
+            if any(index['name'] == 'ft_materials_search' for index in indexes):
+                backend = 'fulltext'
+        search_backends[engine.url] = backend
+    return search_backends[engine.url]
+
+def create_search_index(connection, rebuild=False):
+    """Create the material search index for the connected database and populate it"""
+    search_backends.pop(connection.engine.url, None)
+    
+    if connection.dialect.name == 'sqlite':
+        exists = connection.execute(db.text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'materials_fts'"
+        )).first()
+        for statement in SQLITE_SEARCH_DDL:
+            connection.execute(db.text(statement))
+        if rebuild or not exists:
+            connection.execute(db.text("INSERT INTO materials_fts(materials_fts) VALUES ('rebuild')"))
+    elif connection.dialect.name in ('mysql', 'mariadb'):
+        indexes = db.inspect(connection).get_indexes('materials')
+        if not any(index['name'] == 'ft_materials_search' for index in indexes):
+            connection.execute(db.text(
+                f"ALTER TABLE materials ADD FULLTEXT INDEX ft_materials_search ({', '.join(SEARCH_COLUMNS)})"
+            ))
+
+def material_search_ranking(search):
+    """Subquery of (id, score) for materials matching every indexed search term as a prefix.
+
+    Higher scores are more relevant. Returns (ranking, unindexed terms): the
+    terms shorter than MySQL's FULLTEXT token size, which MATCH would ignore,
+    are returned for the caller to require with LIKE. The ranking is None when
+    no index is available or no term is indexable.
+    """
+    backend = search_backend()
+    terms = re.findall(r'\w+', search)
+    
+    if backend == 'fts5' and terms:
+        match = ' '.join('"{}"*'.format(term) for term in terms)
+        weights = ', '.join(str(weight) for weight in SEARCH_WEIGHTS)
+        return db.text(
+            f"SELECT rowid AS id, -bm25(materials_fts, {weights}) AS score "
+            "FROM materials_fts WHERE materials_fts MATCH :match"
+        ).bindparams(match=match).columns(id=db.Integer, score=db.Float).subquery('material_search'), []
+    
+    if backend == 'fulltext' and terms:
+        min_size = current_app.config['SEARCH_MIN_TOKEN_SIZE']
+        unindexed = [term for term in terms if len(term) < min_size]
+        terms = [term for term in terms if len(term) >= min_size]
+        if not terms:
+            return None, unindexed
+        match = ' '.join(f'+{term}*' for term in terms)
+        columns = ', '.join(SEARCH_COLUMNS)
+        return db.text(
+            f"SELECT id, MATCH({columns}) AGAINST (:match IN BOOLEAN MODE) AS score "
+            f"FROM materials WHERE MATCH({columns}) AGAINST (:match IN BOOLEAN MODE)"
+        ).bindparams(match=match).columns(id=db.Integer, score=db.Float).subquery('material_search'), unindexed
+    
+    return None, []
+
+def apply_material_search(statement, search):
+    """Restrict a materials Query/select to search hits; returns it with the ORDER BY to use"""
+    if not search:
+        return statement, [Material.material_number]
+    
+    ranking, unindexed = material_search_ranking(search)
+    for term in unindexed:
+        # Too short for the FULLTEXT index ("M8" in "M8 bolt"): each must appear in one of the searched columns
+        statement = statement.filter(db.or_(*[getattr(Material, column).contains(term) for column in SEARCH_COLUMNS]))
+    
+    if ranking is None:
+        if not unindexed:
+            statement = statement.filter(db.or_(
+                Material.material_number.contains(search),
+                Material.description.contains(search)
+            ))
+        return statement, [Material.material_number]
+    
+    statement = statement.join(ranking, Material.id == ranking.c.id)
+    return statement, [ranking.c.score.desc(), Material.material_number]
+
+@bp.cli.command('rebuild-search-index')
+def rebuild_search_index_command():
+    """Create (if needed) and repopulate the material full-text search index."""
+    with db.engine.begin() as connection:
+        create_search_index(connection, rebuild=True)
+    print(f"Material search backend: {search_backend()}")
+
+# Schema migrations
+migrations = MigrationRegistry()
+
+def create_indexes(connection, table, names):
+    for index in table.indexes:
+        if index.name in names:
+            index.create(connection, checkfirst=True)
+
+@migrations.migration(1, 'Create email outbox table')
+def create_email_outbox(connection):
+    EmailOutbox.__table__.create(connection, checkfirst=True)
+
+@migrations.migration(2, 'Create and backfill monthly transaction rollup')
+def create_transaction_rollup(connection):
+    TransactionMonthlySummary.__table__.create(connection, checkfirst=True)
+    rebuild_transaction_rollup(connection)
+
+@migrations.migration(3, 'Create material full-text search index')
+def create_material_search_index(connection):
+    create_search_index(connection)
+
+@migrations.migration(4, 'Add indexes for list views, dashboard and reports')
+def create_list_view_indexes(connection):
+    create_indexes(connection, Transaction.__table__, {
+        'ix_transactions_date_id', 'ix_transactions_type_date_id', 'ix_transactions_material_date'
+    })
+    create_indexes(connection, MaterialRequest.__table__, {
+        'ix_requests_date_id', 'ix_requests_status_date_id', 'ix_requests_user_date_id'
+    })
+    create_indexes(connection, Material.__table__, {
+        'ix_materials_active_category', 'ix_materials_active_stock'
+    })
+
+@migrations.migration(5, 'Add index for materials API validators')
+def create_material_api_index(connection):
+    create_indexes(connection, Material.__table__, {'ix_materials_active_updated'})
+
+@migrations.migration(6, 'Create low stock alert state table')
+def create_low_stock_alerts(connection):
+    LowStockAlert.__table__.create(connection, checkfirst=True)
+
+@migrations.migration(7, 'Add stored low stock flag with index')
+def add_low_stock_flag(connection):
+    inspector = db.inspect(connection)
+    if 'low_stock' not in {column['name'] for column in inspector.get_columns('materials')}:
+        connection.execute(db.text("ALTER TABLE materials ADD COLUMN low_stock BOOLEAN NOT NULL DEFAULT 0"))
+    connection.execute(db.update(Material.__table__).values(low_stock=Material.current_stock <= Material.minimum_stock))
+    create_indexes(connection, Material.__table__, {'ix_materials_active_low'})
+    
+    # Superseded by the flag; it only ever served the column-to-column comparison
+    if 'ix_materials_active_stock' in {index['name'] for index in inspector.get_indexes('materials')}:
+        if connection.dialect.name in ('mysql', 'mariadb'):
+            connection.execute(db.text("DROP INDEX ix_materials_active_stock ON materials"))
+        else:
+            connection.execute(db.text("DROP INDEX ix_materials_active_stock"))
+
+@migrations.migration(8, 'Create stock checkpoint table')
+def create_stock_checkpoints(connection):
+    StockCheckpoint.__table__.create(connection, checkfirst=True)
+
+@migrations.migration(9, 'Create transaction archive summary table')
+def create_transaction_archive_summary(connection):
+    TransactionArchiveSummary.__table__.create(connection, checkfirst=True)
+
+@migrations.migration(10, 'Store material last_updated with microseconds')
+def add_last_updated_microseconds(connection):
+    # MySQL DATETIME keeps whole seconds; SQLite and PostgreSQL already keep microseconds
+    if connection.dialect.name in ('mysql', 'mariadb'):
+        connection.execute(db.text("ALTER TABLE materials MODIFY last_updated DATETIME(6) NULL"))
+
+@bp.cli.command('db-upgrade')
+def db_upgrade_command():
+    """Apply pending schema migrations."""
+    applied = migrations.upgrade(db.engine)
+    print(f"Applied {len(applied)} migration(s)" if applied else "Database schema is up to date")
+
+def hot_route_queries():
+    """The statements behind the busiest routes, as (name, statement) pairs for EXPLAIN"""
+    boundary = [datetime.utcnow(), 1]
+    low_stock = db.and_(Material.is_active == True, Material.low_stock == True)
+    request_page = db.select(MaterialRequest).order_by(MaterialRequest.request_date.desc(), MaterialRequest.id.desc()).limit(21)
+    transaction_page = db.select(Transaction).order_by(Transaction.transaction_date.desc(), Transaction.id.desc()).limit(21)
+    
+    return [
+        ('dashboard: active materials', db.select(db.func.count(Material.id)).where(Material.is_active == True)),
+        ('dashboard: low stock count', db.select(db.func.count(Material.id)).where(low_stock)),
+        ('dashboard: pending requests', db.select(db.func.count(MaterialRequest.id)).where(MaterialRequest.status == 'pending')),
+        ('dashboard: stock value', db.select(db.func.sum(Material.current_stock * Material.unit_price))),
+        ('dashboard: low stock list', db.select(Material).where(low_stock).limit(10)),
+        ('dashboard: recent requests', request_page.limit(5)),
+        ('dashboard: recent transactions', transaction_page.limit(5)),
+        ('materials: list', db.select(Material).where(Material.is_active == True).order_by(Material.material_number).limit(20)),
+        ('materials: by category', db.select(Material).where(
+            Material.is_active == True, Material.category == 'category'
+        ).order_by(Material.material_number).limit(20)),
+        ('materials: categories', db.select(Material.category).distinct().where(
+            Material.category.isnot(None), Material.is_active == True
+        )),
+        ('requests: first page', request_page),
+        ('requests: by status', request_page.where(MaterialRequest.status == 'pending')),
+        ('requests: own requests', request_page.where(MaterialRequest.user_id == 1)),
+        ('requests: next page', request_page.where(
+            keyset_condition([MaterialRequest.request_date, MaterialRequest.id], boundary, newer=False)
+        )),
+        ('transactions: first page', transaction_page),
+        ('transactions: by type', transaction_page.where(Transaction.transaction_type == 'issue')),
+        ('transactions: next page', transaction_page.where(
+            keyset_condition([Transaction.transaction_date, Transaction.id], boundary, newer=False)
+        )),
+        ('reports: category stats', db.select(
+            Material.category, db.func.count(Material.id), db.func.sum(Material.current_stock * Material.unit_price)
+        ).where(Material.is_active == True).group_by(Material.category)),
+        ('reports: low stock', db.select(Material).where(low_stock)),
+        ('api: materials validators', db.select(
+            db.func.max(Material.last_updated), db.func.count(Material.id)
+        ).where(Material.is_active == True)),
+        ('api: materials page', db.select(Material.id, Material.material_number, Material.current_stock).where(
+            Material.is_active == True, keyset_condition([Material.id], [1000], newer=False)
+        ).order_by(Material.id.desc()).limit(21)),
+    ]
+
+@bp.cli.command('explain-check')
+def explain_check_command():
+    """EXPLAIN the hot route queries and fail if any of them needs a full table scan."""
+    failures = 0
+    with db.engine.connect() as connection:
+        for name, statement in hot_route_queries():
+            problems = full_scans(connection, statement)
+            if problems:
+                failures += 1
+                print(f"FULL SCAN  {name}: {'; '.join(problems)}")
+            else:
+                print(f"ok         {name}")
+    
+    if failures:
+        print(f"{failures} query plan(s) fall back to a full table scan")
+        raise SystemExit(1)
+
+# Query filters shared by the list views and their exports
+def material_filters(category=''):
+    """Filter criteria for the materials list; search is applied by apply_material_search()"""
+    criteria = [Material.is_active == True]
+    
+    if category:
+        criteria.append(Material.category == category)
+    
+    return criteria
+
+def material_request_filters(status_filter=''):
+    """Filter criteria for the requests list; staff only see their own requests"""
+    criteria = []
+    
+    if not current_user.is_manager():
+        criteria.append(MaterialRequest.user_id == current_user.id)
+    
+    if status_filter:
+        criteria.append(MaterialRequest.status == status_filter)
+    
+    return criteria
+
+def transaction_filters(transaction_type='', start=None, end=None):
+    """Filter criteria for the transaction history, dated within [start, end) when given"""
+    criteria = []
+    
+    if transaction_type:
+        criteria.append(Transaction.transaction_type == transaction_type)
+    
+    if start is not None:
+        criteria.append(Transaction.transaction_date >= start)
+    if end is not None:
+        criteria.append(Transaction.transaction_date < end)
+    
+    return criteria
+
+# Paginated list queries
+def cached_count(key, query):
+    """Row count for a list header, cached for COUNT_CACHE_TTL instead of recounted per page"""
+    return get_or_set(cache, f'count:{key}', lambda: query.order_by(None).count(), current_app.config['COUNT_CACHE_TTL'])
+
+def per_page_arg():
+    return max(1, min(request.args.get('per_page', current_app.config['PER_PAGE'], type=int), current_app.config['MAX_PER_PAGE']))
+
+def material_requests_page(status_filter, cursor, per_page):
+    """Keyset page of requests, newest first, keyed on (request_date, id)"""
+    query = MaterialRequest.query.filter(*material_request_filters(status_filter))
+    scope = 'all' if current_user.is_manager() else current_user.id
+    total = cached_count(f'requests:{scope}:{status_filter}', query)
+    
+    return paginator.paginate(
+        query.options(
+            db.joinedload(MaterialRequest.material),
+            db.joinedload(MaterialRequest.requester)
+        ),
+        [MaterialRequest.request_date, MaterialRequest.id],
+        cursor=cursor, per_page=per_page, total=total
+    )
+
+def transactions_page(transaction_type, cursor, per_page, start=None, end=None):
+    """Keyset page of transactions, newest first, keyed on (transaction_date, id).
+
+    Pages run on from the transactions table into the archived months, which
+    are only read once a page gets past the oldest row still in the table.
+    """
+    query = Transaction.query.filter(*transaction_filters(transaction_type, start, end))
+    months, archived = archived_index(transaction_type, start, end)
+    total = cached_count(f'transactions:{transaction_type}:{start}:{end}', query) + archived
+    columns = [Transaction.transaction_date, Transaction.id]
+    
+    return paginator.paginate_sources(
+        [
+            query_source(query.options(
+                db.joinedload(Transaction.material),
+                db.joinedload(Transaction.user)
+            ), columns),
+            archived_transactions_source(months, transaction_type, start, end)
+        ],
+        lambda item: [item.transaction_date, item.id],
+        cursor=cursor, per_page=per_page, total=total
+    )
+
+def date_range_args():
+    """The ``start``/``end`` arguments (YYYY-MM-DD, both inclusive) as (start, end) bounding [start, end + 1 day).
+
+    Missing or malformed dates leave that side open.
+    """
+    bounds = []
+    for name, days in (('start', 0), ('end', 1)):
+        try:
+            day = datetime.strptime(request.args.get(name, ''), '%Y-%m-%d')
+        except ValueError:
+            day = None
+        bounds.append(day + timedelta(days=days) if day else None)
+    return tuple(bounds)
+
+def as_of_date_arg():
+    """The ``date`` argument (YYYY-MM-DD, default today) as (date, end of that day UTC); None if malformed"""
+    try:
+        day = datetime.strptime(request.args['date'], '%Y-%m-%d').date() if request.args.get('date') else datetime.utcnow().date()
+    except ValueError:
+        return None
+    return day, datetime.combine(day + timedelta(days=1), datetime.min.time())
+
+def stock_as_of_page(moment, category, material_number, cursor, per_page):
+    """Keyset page of materials with their stock at ``moment``, newest first; returns (page, checkpoint used)"""
+    stock, checkpoint = stock_as_of_column(moment)
+    criteria = material_filters(category)
+    if material_number:
+        criteria.append(Material.material_number == material_number)
+    total = None if material_number else cached_count(f'materials:{category}', Material.query.filter(*criteria))
+    
+    page = paginator.paginate(
+        db.session.query(
+            Material.id, Material.material_number, Material.description, Material.category,
+            Material.unit, Material.current_stock, stock
+        ).filter(*criteria),
+        [Material.id],
+        cursor=cursor, per_page=per_page, total=total
+    )
+    
+    # Transactions of archived months between the checkpoint and ``moment`` are no longer in the table
+    movements = archived_movements(checkpoint, moment)
+    if movements:
+        page.items = [
+            SimpleNamespace(**{**row._asdict(), 'stock_as_of': row.stock_as_of + movements.get(row.id, 0)})
+            for row in page.items
+        ]
+    return page, checkpoint
+
+def request_to_dict(request_obj):
+    return {
+        'id': request_obj.id,
+        'material_id': request_obj.material_id,
+        'material_number': request_obj.material.material_number,
+        'requester': request_obj.requester.username,
+        'quantity_requested': request_obj.quantity_requested,
+        'quantity_approved': request_obj.quantity_approved,
+        'unit': request_obj.material.unit,
+        'purpose': request_obj.purpose,
+        'priority': request_obj.priority,
+        'status': request_obj.status,
+        'request_date': request_obj.request_date.isoformat() if request_obj.request_date else None
+    }
+
+def transaction_to_dict(transaction):
+    return {
+        'id': transaction.id,
+        'material_id': transaction.material_id,
+        'material_number': transaction.material.material_number,
+        'transaction_type': transaction.transaction_type,
+        'quantity': transaction.quantity,
+        'unit': transaction.material.unit,
+        'unit_price': transaction.unit_price,
+        'user': transaction.user.username,
+        'reference_number': transaction.reference_number,
+        'purpose': transaction.purpose,
+        'transaction_date': transaction.transaction_date.isoformat() if transaction.transaction_date else None
+    }
+
+def stock_row_to_dict(row):
+    return {
+        'id': row.id,
+        'material_number': row.material_number,
+        'description': row.description,
+        'category': row.category,
+        'unit': row.unit,
+        'stock_as_of': row.stock_as_of,
+        'current_stock': row.current_stock
+    }
+
+def page_to_dict(page, serialize):
+    return {
+        'items': [serialize(item) for item in page.items],
+        'next_cursor': page.next_cursor,
+        'prev_cursor': page.prev_cursor,
+        'per_page': page.per_page,
+        'total': page.total
+    }
+
+# Dashboard statistics
+def dashboard_statistics():
+    """Dashboard aggregates as plain values so they can be cached outside the session"""
+    total_materials = Material.query.filter_by(is_active=True).count()
+    low_stock_count = Material.query.filter(
+        Material.low_stock == True,
+        Material.is_active == True
+    ).count()
+    
+    pending_requests = MaterialRequest.query.filter_by(status='pending').count()
+    total_stock_value = db.session.query(db.func.sum(Material.current_stock * Material.unit_price)).scalar() or 0
+    
+    # Recent activities (relationships eager-loaded so the template does not trigger one query per row)
+    recent_requests = MaterialRequest.query.options(
+        db.joinedload(MaterialRequest.material),
+        db.joinedload(MaterialRequest.requester)
+    ).order_by(MaterialRequest.request_date.desc()).limit(5).all()
+    recent_transactions = Transaction.query.options(
+        db.joinedload(Transaction.material),
+        db.joinedload(Transaction.user)
+    ).order_by(Transaction.transaction_date.desc()).limit(5).all()
+    
+    # Low stock materials
     low_stock_materials = Material.query.filter(
-        Material.current_stock <= Material.minimum_stock,
+        Material.low_stock == True,
         Material.is_active == True
-    ).all()
+    ).limit(10).all()
     
-    if not low_stock_materials:
-        return
+    def material_summary(material):
+        return SimpleNamespace(
+            material_number=material.material_number,
+            description=material.description,
+            unit=material.unit,
+            current_stock=material.current_stock,
+            minimum_stock=material.minimum_stock,
+            location=material.location
+        )
     
-    managers = User.query.filter(User.role.in_(['admin', 'manager']), User.is_active == True).all()
+    return {
+        'total_materials': total_materials,
+        'low_stock_count': low_stock_count,
+        'pending_requests': pending_requests,
+        'total_stock_value': total_stock_value,
+        'recent_requests': [SimpleNamespace(
+            status=r.status,
+            material=material_summary(r.material),
+            requester=SimpleNamespace(username=r.requester.username),
+            quantity_requested=r.quantity_requested,
+            request_date=r.request_date
+        ) for r in recent_requests],
+        'recent_transactions': [SimpleNamespace(
+            transaction_date=t.transaction_date,
+            material=material_summary(t.material),
+            transaction_type=t.transaction_type,
+            quantity=t.quantity,
+            user=SimpleNamespace(username=t.user.username),
+            purpose=t.purpose
+        ) for t in recent_transactions],
+        'low_stock_materials': [material_summary(m) for m in low_stock_materials]
+    }
+
+# Export helpers
+MATERIAL_EXPORT_COLUMNS = [
+    ('material_number', Material.material_number),
+    ('description', Material.description),
+    ('category', Material.category),
+    ('unit', Material.unit),
+    ('current_stock', Material.current_stock),
+    ('minimum_stock', Material.minimum_stock),
+    ('maximum_stock', Material.maximum_stock),
+    ('unit_price', Material.unit_price),
+    ('location', Material.location),
+    ('rack_number', Material.rack_number),
+    ('bin_number', Material.bin_number),
+    ('supplier', Material.supplier),
+    ('last_updated', Material.last_updated)
+]
+
+REQUEST_EXPORT_COLUMNS = [
+    ('request_id', MaterialRequest.id),
+    ('material_number', Material.material_number),
+    ('description', Material.description),
+    ('requester', User.username),
+    ('department', User.department),
+    ('quantity_requested', MaterialRequest.quantity_requested),
+    ('quantity_approved', MaterialRequest.quantity_approved),
+    ('unit', Material.unit),
+    ('purpose', MaterialRequest.purpose),
+    ('priority', MaterialRequest.priority),
+    ('status', MaterialRequest.status),
+    ('request_date', MaterialRequest.request_date),
+    ('approved_date', MaterialRequest.approved_date),
+    ('issued_date', MaterialRequest.issued_date),
+    ('remarks', MaterialRequest.remarks)
+]
+
+TRANSACTION_EXPORT_COLUMNS = [
+    ('transaction_date', Transaction.transaction_date),
+    ('material_number', Material.material_number),
+    ('description', Material.description),
+    ('transaction_type', Transaction.transaction_type),
+    ('quantity', Transaction.quantity),
+    ('unit', Material.unit),
+    ('unit_price', Transaction.unit_price),
+    ('user', User.username),
+    ('purpose', Transaction.purpose),
+    ('reference_number', Transaction.reference_number),
+    ('remarks', Transaction.remarks)
+]
+
+def stream_export_rows(statement):
+    """Yield result rows in batches from a server-side cursor"""
+    result = db.session.execute(statement.execution_options(
+        stream_results=True, yield_per=current_app.config['EXPORT_BATCH_SIZE']
+    ))
+    try:
+        for batch in result.partitions():
+            yield batch
+    finally:
+        result.close()
+
+def export_response(columns, statement, name, file_format, batches=None):
+    """Stream a query as a CSV or XLSX download without materialising it in memory.
+
+    ``batches`` replaces the query's own row batches, for exports that add rows from elsewhere.
+    """
+    headers = [label for label, _ in columns]
+    filename = f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{file_format}"
     
-    for manager in managers:
-        subject = f"ABB Store Management - Low Stock Alert ({len(low_stock_materials)} items)"
-        body = "The following materials are running low on stock:\n\n"
+    if file_format == 'xlsx':
+        from openpyxl import Workbook
         
-        for material in low_stock_materials:
-            body += f"• {material.material_number} - {material.description}\n"
-            body += f"  Current Stock: {material.current_stock} {material.unit}\n"
-            body += f"  Minimum Stock: {material.minimum_stock} {material.unit}\n"
-            body += f"  Location: {material.location or 'Not specified'}\n\n"
+        # Write-only workbooks flush rows to disk as they are appended
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet(title=name.title())
+        sheet.append(headers)
+        for batch in batches or stream_export_rows(statement):
+            for row in batch:
+                sheet.append(list(row))
         
-        body += "Please take necessary action to replenish the stock.\n\n"
-        body += "Best regards,\nABB Store Management System"
-        
-        send_email(manager.email, subject, body)
+        output = tempfile.TemporaryFile()
+        workbook.save(output)
+        output.seek(0)
+        return send_file(output, as_attachment=True, download_name=filename,
+                         mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+    
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(headers)
+        for batch in batches or stream_export_rows(statement):
+            writer.writerows(batch)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+    
+    return Response(stream_with_context(generate()), mimetype='text/csv',
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
+
+# Materials API
+MATERIAL_API_FIELDS = dict([('id', Material.id)] + MATERIAL_EXPORT_COLUMNS)
+
+def material_validators(query):
+    """Strong ETag, Last-Modified and row count for a filtered materials query.
+
+    One aggregate over the (is_active, last_updated) index decides whether the
+    client's copy is current, before any page is fetched or serialized.
+    last_updated keeps microseconds, so two edits within a second give two tags.
+    """
+    last_modified, count = query.with_entities(
+        db.func.max(Material.last_updated), db.func.count(Material.id)
+    ).order_by(None).one()
+    signature = f"{request.full_path}|{last_modified}|{count}"
+    return hashlib.sha1(signature.encode()).hexdigest(), last_modified, count
+
+def material_row_to_dict(row, fields):
+    values = {}
+    for name in fields:
+        value = getattr(row, name)
+        values[name] = value.isoformat() if isinstance(value, datetime) else value
+    return values
+
+# Request metrics: recorded per thread without locks, summed when /metrics is scraped
+def create_metrics():
+    registry = MetricsRegistry()
+    registry.describe('abb_store_http_requests_total', 'counter', 'Requests by endpoint, method and status')
+    registry.describe('abb_store_http_request_duration_seconds', 'histogram', 'Request latency by endpoint')
+    registry.describe('abb_store_http_request_sql_statements_total', 'counter', 'SQL statements executed while serving requests, by endpoint')
+    registry.describe('abb_store_http_request_sql_seconds_total', 'counter', 'Time spent in SQL statements while serving requests, by endpoint')
+    registry.describe('abb_store_emails_total', 'counter', 'Outbox delivery attempts by resulting status (pending = retry scheduled)')
+    registry.describe('abb_store_import_rows_total', 'counter', 'Excel import rows by outcome')
+    registry.describe('abb_store_jobs_total', 'counter', 'Background and import job runs by outcome')
+    registry.collector('abb_store_db_pool_connections', 'gauge', 'Database pool connections by state', pool_connections)
+    registry.collector('abb_store_cache_requests', 'counter', 'Cache lookups by cache and result', cache_requests)
+    return registry
+
+def pool_connections():
+    pool = db.engine.pool
+    if not hasattr(pool, 'overflow'):
+        return {}  # only QueuePool keeps counts
+    return {
+        (('state', 'size'),): pool.size(),
+        (('state', 'checked_out'),): pool.checkedout(),
+        (('state', 'checked_in'),): pool.checkedin(),
+        (('state', 'overflow'),): max(pool.overflow(), 0)  # negative while the pool has spare capacity
+    }
+
+def cache_requests():
+    values = {}
+    for name, backend in (('query', cache), ('user', user_cache)):
+        stats = backend.stats()
+        values[(('cache', name), ('result', 'hit'))] = stats['hits']
+        values[(('cache', name), ('result', 'miss'))] = stats['misses']
+    return values
+
+@db.event.listens_for(Engine, 'before_cursor_execute')
+def start_statement_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info['statement_started'] = time.perf_counter()
+
+@db.event.listens_for(Engine, 'after_cursor_execute')
+def record_statement_time(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'sql_statements' in g:
+        elapsed = time.perf_counter() - conn.info['statement_started']
+        g.sql_statements += 1
+        g.sql_seconds += elapsed
+        if g.sql_profile is not None:
+            g.sql_profile.record(statement, parameters, executemany, elapsed)
+
+@bp.before_app_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    g.sql_statements = 0
+    g.sql_seconds = 0.0
+    g.sql_profile = None
+    if current_app.config['SQL_PROFILER_ENABLED'] and request.endpoint != 'main.sql_profiler':
+        g.sql_profile = RequestProfile(request.method, request.full_path.rstrip('?'), request.endpoint)
+
+@bp.after_app_request
+def finish_request_on_close(response):
+    """Record the request's metrics and SQL profile once the response is closed, so the
+    statements and time of a streamed export's generator are counted too"""
+    if 'request_started' not in g:
+        return response
+    app = current_app._get_current_object()
+    request_globals = g._get_current_object()  # still updated by statements run while streaming
+    endpoint = request.endpoint or 'unmatched'
+    method = request.method
+    status = response.status_code
+    
+    def finish():
+        record_request_metrics(app, request_globals, endpoint, method, status)
+        finish_sql_profile(app, request_globals.sql_profile, status)
+    
+    response.call_on_close(finish)
+    return response
+
+def record_request_metrics(app, request_globals, endpoint, method, status):
+    # runs after the request context is gone, so the app's services are looked up directly
+    registry = app.extensions['abb_store']['metrics']
+    registry.observe('abb_store_http_request_duration_seconds', time.perf_counter() - request_globals.request_started, endpoint=endpoint)
+    registry.inc('abb_store_http_requests_total', endpoint=endpoint, method=method, status=status)
+    registry.inc('abb_store_http_request_sql_statements_total', request_globals.sql_statements, endpoint=endpoint)
+    registry.inc('abb_store_http_request_sql_seconds_total', request_globals.sql_seconds, endpoint=endpoint)
+
+def finish_sql_profile(app, profile, status):
+    if profile is None:
+        return
+    profile.finish(status, app.config['SQL_PROFILER_SLOW_MS'] / 1000, app.config['SQL_PROFILER_REPEAT_THRESHOLD'])
+    app.extensions['abb_store']['sql_profiles'].add(profile)
+    if profile.flagged:
+        app.logger.warning(profile.summary())
+    else:
+        app.logger.info(profile.summary())
+
+@bp.route('/metrics')
+def prometheus_metrics():
+    if not current_app.config['METRICS_ENABLED']:
+        abort(404)
+    token = current_app.config['METRICS_TOKEN']
+    if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return Response('Unauthorized\n', 401, {'WWW-Authenticate': 'Bearer'})
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
 
 # Routes
-@app.route('/')
+@bp.route('/')
 def index():
     if current_user.is_authenticated:
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
     return render_template('landing.html')
 
-@app.route('/login', methods=['GET', 'POST'])
+@bp.route('/login', methods=['GET', 'POST'])
 def login():
     if current_user.is_authenticated:
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
     
     form = LoginForm()
     if form.validate_on_submit():
         user = User.query.filter_by(username=form.username.data).first()
         
-        if user and user.check_password(form.password.data) and user.is_active:
+        try:
+            authenticated = user is not None and user.check_password(form.password.data)
+        except PasswordHasherBusy:
+            flash('Too many sign-ins at the moment. Please try again in a few seconds.', 'warning')
+            return render_template('login.html', form=form), 503
+        
+        if authenticated and user.is_active:
             login_user(user)
             user.last_login = datetime.utcnow()
+            
+            # Upgrade hashes made with older scrypt parameters while the password is at hand
+            if password_hasher.needs_rehash(user.password_hash):
+                try:
+                    user.set_password(form.password.data)
+                except PasswordHasherBusy:
+                    pass
+            
             db.session.commit()
             
             next_page = request.args.get('next')
             if not next_page or not next_page.startswith('/'):
-                next_page = url_for('dashboard')
+                next_page = url_for('main.dashboard')
             
             flash(f'Welcome back, {user.username}!', 'success')
             return redirect(next_page)
@@ -315,66 +1908,31 @@ def login():
     
     return render_template('login.html', form=form)
 
-@app.route('/logout')
+@bp.route('/logout')
 @login_required
 def logout():
     logout_user()
     flash('You have been logged out successfully.', 'info')
-    return redirect(url_for('index'))
+    return redirect(url_for('main.index'))
 
-@app.route('/dashboard')
+@bp.route('/dashboard')
 @login_required
 def dashboard():
-    # Dashboard statistics
-    total_materials = Material.query.filter_by(is_active=True).count()
-    low_stock_count = Material.query.filter(
-        Material.current_stock <= Material.minimum_stock,
-        Material.is_active == True
-    ).count()
-    
-    pending_requests = MaterialRequest.query.filter_by(status='pending').count()
-    total_stock_value = db.session.query(db.func.sum(Material.current_stock * Material.unit_price)).scalar() or 0
-    
-    # Recent activities
-    recent_requests = MaterialRequest.query.order_by(MaterialRequest.request_date.desc()).limit(5).all()
-    recent_transactions = Transaction.query.order_by(Transaction.transaction_date.desc()).limit(5).all()
-    
-    # Low stock materials
-    low_stock_materials = Material.query.filter(
-        Material.current_stock <= Material.minimum_stock,
-        Material.is_active == True
-    ).limit(10).all()
+    stats = get_or_set(cache, 'dashboard:stats', dashboard_statistics, current_app.config['DASHBOARD_CACHE_TTL'])
     
-    return render_template('dashboard.html',
-                         total_materials=total_materials,
-                         low_stock_count=low_stock_count,
-                         pending_requests=pending_requests,
-                         total_stock_value=total_stock_value,
-                         recent_requests=recent_requests,
-                         recent_transactions=recent_transactions,
-                         low_stock_materials=low_stock_materials)
-
-@app.route('/materials')
+    return render_template('dashboard.html', **stats)
+
+@bp.route('/materials')
 @login_required
 def materials():
     page = request.args.get('page', 1, type=int)
     search = request.args.get('search', '')
     category = request.args.get('category', '')
     
-    query = Material.query.filter_by(is_active=True)
-    
-    if search:
-        query = query.filter(
-            db.or_(
-                Material.material_number.contains(search),
-                Material.description.contains(search)
-            )
-        )
+    query = Material.query.filter(*material_filters(category))
+    query, order = apply_material_search(query, search)
     
-    if category:
-        query = query.filter_by(category=category)
-    
-    materials = query.order_by(Material.material_number).paginate(
+    materials = query.order_by(*order).paginate(
         page=page, per_page=20, error_out=False
     )
     
@@ -385,12 +1943,24 @@ def materials():
     
     return render_template('materials.html', materials=materials, categories=categories, search=search, category=category)
 
-@app.route('/materials/add', methods=['GET', 'POST'])
+@bp.route('/materials/export')
+@login_required
+def export_materials():
+    file_format = 'xlsx' if request.args.get('format') == 'xlsx' else 'csv'
+    criteria = material_filters(request.args.get('category', ''))
+    
+    statement = db.select(*[column for _, column in MATERIAL_EXPORT_COLUMNS]).where(*criteria)
+    statement, order = apply_material_search(statement, request.args.get('search', ''))
+    statement = statement.order_by(*order)
+    
+    return export_response(MATERIAL_EXPORT_COLUMNS, statement, 'materials', file_format)
+
+@bp.route('/materials/add', methods=['GET', 'POST'])
 @login_required
 def add_material():
     if not current_user.is_manager():
         flash('Access denied. Manager privileges required.', 'danger')
-        return redirect(url_for('materials'))
+        return redirect(url_for('main.materials'))
     
     form = MaterialForm()
     if form.validate_on_submit():
@@ -426,16 +1996,16 @@ def add_material():
         db.session.commit()
         
         flash(f'Material {material.material_number} added successfully!', 'success')
-        return redirect(url_for('materials'))
+        return redirect(url_for('main.materials'))
     
     return render_template('material_form.html', form=form, title='Add Material')
 
-@app.route('/materials/<int:id>/edit', methods=['GET', 'POST'])
+@bp.route('/materials/<int:id>/edit', methods=['GET', 'POST'])
 @login_required
 def edit_material(id):
     if not current_user.is_manager():
         flash('Access denied. Manager privileges required.', 'danger')
-        return redirect(url_for('materials'))
+        return redirect(url_for('main.materials'))
     
     material = Material.query.get_or_404(id)
     form = MaterialForm(obj=material)
@@ -443,17 +2013,25 @@ def edit_material(id):
     
     if form.validate_on_submit():
         old_stock = material.current_stock
+        stock_change = round(form.current_stock.data - float(old_stock), 2)
         
         form.populate_obj(material)
         material.last_updated = datetime.utcnow()
+        # Stock moves through adjust_stock() below, never as an absolute overwrite
+        db.session.expire(material, ['current_stock'])
         
         # Log stock adjustment if changed
-        if old_stock != material.current_stock:
+        if stock_change:
+            if not adjust_stock(material, stock_change):
+                db.session.rollback()
+                flash('Stock changed while you were editing and cannot be reduced that far. Please review and try again.', 'danger')
+                return redirect(url_for('main.edit_material', id=id))
+            
             transaction = Transaction(
                 material_id=material.id,
                 user_id=current_user.id,
                 transaction_type='adjust',
-                quantity=material.current_stock - old_stock,
+                quantity=stock_change,
                 unit_price=material.unit_price,
                 purpose='Stock adjustment',
                 remarks=f'Stock adjusted from {old_stock} to {material.current_stock}'
@@ -462,55 +2040,55 @@ def edit_material(id):
         
         db.session.commit()
         flash(f'Material {material.material_number} updated successfully!', 'success')
-        return redirect(url_for('materials'))
+        return redirect(url_for('main.materials'))
     
     return render_template('material_form.html', form=form, title='Edit Material', material=material)
 
-@app.route('/materials/<int:id>/delete', methods=['POST'])
+@bp.route('/materials/<int:id>/delete', methods=['POST'])
 @login_required
 def delete_material(id):
     if not current_user.is_admin():
         flash('Access denied. Administrator privileges required.', 'danger')
-        return redirect(url_for('materials'))
+        return redirect(url_for('main.materials'))
     
     material = Material.query.get_or_404(id)
     material.is_active = False
     db.session.commit()
     
     flash(f'Material {material.material_number} deactivated successfully!', 'success')
-    return redirect(url_for('materials'))
+    return redirect(url_for('main.materials'))
 
-@app.route('/requests')
+@bp.route('/requests')
 @login_required
 def material_requests():
-    page = request.args.get('page', 1, type=int)
     status_filter = request.args.get('status', '')
     
-    if current_user.is_manager():
-        query = MaterialRequest.query
-    else:
-        query = MaterialRequest.query.filter_by(user_id=current_user.id)
+    requests = material_requests_page(status_filter, request.args.get('cursor'), current_app.config['PER_PAGE'])
     
-    if status_filter:
-        query = query.filter_by(status=status_filter)
+    return render_template('material_requests.html', requests=requests, status_filter=status_filter)
+
+@bp.route('/requests/export')
+@login_required
+def export_requests():
+    file_format = 'xlsx' if request.args.get('format') == 'xlsx' else 'csv'
+    criteria = material_request_filters(request.args.get('status', ''))
     
-    requests = query.order_by(MaterialRequest.request_date.desc()).paginate(
-        page=page, per_page=20, error_out=False
-    )
+    statement = db.select(*[column for _, column in REQUEST_EXPORT_COLUMNS]).join(
+        Material, MaterialRequest.material_id == Material.id
+    ).join(
+        User, MaterialRequest.user_id == User.id
+    ).where(*criteria).order_by(MaterialRequest.request_date.desc())
     
-    return render_template('material_requests.html', requests=requests, status_filter=status_filter)
+    return export_response(REQUEST_EXPORT_COLUMNS, statement, 'requests', file_format)
 
-@app.route('/requests/new', methods=['GET', 'POST'])
+@bp.route('/requests/new', methods=['GET', 'POST'])
 @login_required
 def new_request():
     form = MaterialRequestForm()
     
-    # Populate material choices
-    materials = Material.query.filter_by(is_active=True).order_by(Material.material_number).all()
-    form.material_id.choices = [(m.id, f"{m.material_number} - {m.description}") for m in materials]
-    
+    # Materials are picked through the /api/materials/search typeahead; only the submitted id is validated
     if form.validate_on_submit():
-        material = Material.query.get(form.material_id.data)
+        material = form.material
         
         request_obj = MaterialRequest(
             material_id=form.material_id.data,
@@ -521,9 +2099,8 @@ def new_request():
         )
         
         db.session.add(request_obj)
-        db.session.commit()
         
-        # Send notification to managers
+        # Notify managers (delivered by the outbox worker once the request is committed)
         managers = User.query.filter(User.role.in_(['admin', 'manager']), User.is_active == True).all()
         for manager in managers:
             subject = f"New Material Request - {material.material_number}"
@@ -541,32 +2118,34 @@ Please review and approve/reject this request in the system.
 Best regards,
 ABB Store Management System
             """
-            send_email(manager.email, subject, body)
+            queue_email(manager.email, subject, body)
+        
+        db.session.commit()
         
         flash('Material request submitted successfully!', 'success')
-        return redirect(url_for('material_requests'))
+        return redirect(url_for('main.material_requests'))
     
     return render_template('request_form.html', form=form, title='New Material Request')
 
-@app.route('/requests/<int:id>/approve', methods=['POST'])
+@bp.route('/requests/<int:id>/approve', methods=['POST'])
 @login_required
 def approve_request(id):
     if not current_user.is_manager():
         flash('Access denied. Manager privileges required.', 'danger')
-        return redirect(url_for('material_requests'))
+        return redirect(url_for('main.material_requests'))
     
     request_obj = MaterialRequest.query.get_or_404(id)
     
     if request_obj.status != 'pending':
         flash('Only pending requests can be approved.', 'warning')
-        return redirect(url_for('material_requests'))
+        return redirect(url_for('main.material_requests'))
     
     approved_quantity = float(request.form.get('approved_quantity', request_obj.quantity_requested))
     remarks = request.form.get('remarks', '')
     
     if approved_quantity > request_obj.material.current_stock:
         flash('Insufficient stock to approve this request.', 'danger')
-        return redirect(url_for('material_requests'))
+        return redirect(url_for('main.material_requests'))
     
     request_obj.status = 'approved'
     request_obj.quantity_approved = approved_quantity
@@ -574,8 +2153,6 @@ def approve_request(id):
     request_obj.approved_date = datetime.utcnow()
     request_obj.remarks = remarks
     
-    db.session.commit()
-    
     # Send notification to requester
     subject = f"Material Request Approved - {request_obj.material.material_number}"
     body = f"""
@@ -593,23 +2170,24 @@ Please collect the material from the store.
 Best regards,
 ABB Store Management System
     """
-    send_email(request_obj.requester.email, subject, body)
+    queue_email(request_obj.requester.email, subject, body)
+    db.session.commit()
     
     flash('Request approved successfully!', 'success')
-    return redirect(url_for('material_requests'))
+    return redirect(url_for('main.material_requests'))
 
-@app.route('/requests/<int:id>/reject', methods=['POST'])
+@bp.route('/requests/<int:id>/reject', methods=['POST'])
 @login_required
 def reject_request(id):
     if not current_user.is_manager():
         flash('Access denied. Manager privileges required.', 'danger')
-        return redirect(url_for('material_requests'))
+        return redirect(url_for('main.material_requests'))
     
     request_obj = MaterialRequest.query.get_or_404(id)
     
     if request_obj.status != 'pending':
         flash('Only pending requests can be rejected.', 'warning')
-        return redirect(url_for('material_requests'))
+        return redirect(url_for('main.material_requests'))
     
     remarks = request.form.get('remarks', '')
     
@@ -618,8 +2196,6 @@ def reject_request(id):
     request_obj.approved_date = datetime.utcnow()
     request_obj.remarks = remarks
     
-    db.session.commit()
-    
     # Send notification to requester
     subject = f"Material Request Rejected - {request_obj.material.material_number}"
     body = f"""
@@ -636,36 +2212,42 @@ Please contact your manager for more information.
 Best regards,
 ABB Store Management System
     """
-    send_email(request_obj.requester.email, subject, body)
+    queue_email(request_obj.requester.email, subject, body)
+    db.session.commit()
     
     flash('Request rejected successfully!', 'success')
-    return redirect(url_for('material_requests'))
+    return redirect(url_for('main.material_requests'))
 
-@app.route('/requests/<int:id>/issue', methods=['POST'])
+@bp.route('/requests/<int:id>/issue', methods=['POST'])
 @login_required
 def issue_material(id):
     if not current_user.is_manager():
         flash('Access denied. Manager privileges required.', 'danger')
-        return redirect(url_for('material_requests'))
+        return redirect(url_for('main.material_requests'))
     
     request_obj = MaterialRequest.query.get_or_404(id)
     
     if request_obj.status != 'approved':
         flash('Only approved requests can be issued.', 'warning')
-        return redirect(url_for('material_requests'))
-    
-    if request_obj.quantity_approved > request_obj.material.current_stock:
-        flash('Insufficient stock to issue this material.', 'danger')
-        return redirect(url_for('material_requests'))
+        return redirect(url_for('main.material_requests'))
+    
+    # Claim the request with a conditional UPDATE so it can only be issued once
+    claimed = MaterialRequest.query.filter_by(id=request_obj.id, status='approved').update({
+        MaterialRequest.status: 'issued',
+        MaterialRequest.issued_by: current_user.id,
+        MaterialRequest.issued_date: datetime.utcnow()
+    }, synchronize_session=False)
+    if not claimed:
+        db.session.rollback()
+        flash('This request has already been issued.', 'warning')
+        return redirect(url_for('main.material_requests'))
+    db.session.expire(request_obj, ['status', 'issued_by', 'issued_date'])
     
     # Update material stock
-    request_obj.material.current_stock -= request_obj.quantity_approved
-    request_obj.material.last_updated = datetime.utcnow()
-    
-    # Update request status
-    request_obj.status = 'issued'
-    request_obj.issued_by = current_user.id
-    request_obj.issued_date = datetime.utcnow()
+    if not adjust_stock(request_obj.material, -request_obj.quantity_approved):
+        db.session.rollback()
+        flash('Insufficient stock to issue this material.', 'danger')
+        return redirect(url_for('main.material_requests'))
     
     # Create transaction record
     transaction = Transaction(
@@ -680,7 +2262,6 @@ def issue_material(id):
     )
     
     db.session.add(transaction)
-    db.session.commit()
     
     # Send notification to requester
     subject = f"Material Issued - {request_obj.material.material_number}"
@@ -697,39 +2278,198 @@ Transaction Reference: REQ-{request_obj.id}
 Best regards,
 ABB Store Management System
     """
-    send_email(request_obj.requester.email, subject, body)
+    queue_email(request_obj.requester.email, subject, body)
+    db.session.commit()
     
     flash('Material issued successfully!', 'success')
-    return redirect(url_for('material_requests'))
+    return redirect(url_for('main.material_requests'))
+
+# Batch request processing: (required status, new status, past tense) per action
+BATCH_ACTIONS = {
+    'approve': ('pending', 'approved', 'Approved'),
+    'reject': ('pending', 'rejected', 'Rejected'),
+    'issue': ('approved', 'issued', 'Issued')
+}
 
-@app.route('/transactions')
+@bp.route('/requests/batch', methods=['POST'])
+@login_required
+def batch_requests():
+    """Approve, reject or issue many requests in one transaction with one summary email per requester"""
+    if not current_user.is_manager():
+        flash('Access denied. Manager privileges required.', 'danger')
+        return redirect(url_for('main.material_requests'))
+    
+    action = request.form.get('action', '')
+    if action not in BATCH_ACTIONS:
+        flash('Unknown batch action.', 'danger')
+        return redirect(url_for('main.material_requests'))
+    
+    required_status, new_status, done = BATCH_ACTIONS[action]
+    remarks = request.form.get('remarks', '')
+    request_ids = list(dict.fromkeys(request.form.getlist('request_ids', type=int)))
+    if not request_ids:
+        flash('Select at least one request.', 'warning')
+        return redirect(url_for('main.material_requests'))
+    if len(request_ids) > current_app.config['BATCH_MAX_REQUESTS']:
+        flash(f"Select at most {current_app.config['BATCH_MAX_REQUESTS']} requests per batch "
+              f"({len(request_ids)} selected); nothing was {done.lower()}.", 'danger')
+        return redirect(url_for('main.material_requests', status=request.form.get('status_filter', '')))
+    
+    # Lock the selected requests, then their materials once, always in id order so
+    # concurrent batches and single issues cannot deadlock (FOR UPDATE is a no-op on SQLite)
+    selected = MaterialRequest.query.options(db.selectinload(MaterialRequest.requester)).filter(
+        MaterialRequest.id.in_(request_ids),
+        MaterialRequest.status == required_status
+    ).order_by(MaterialRequest.id).with_for_update().all()
+    
+    material_query = Material.query.filter(Material.id.in_({r.material_id for r in selected})).order_by(Material.id)
+    if action != 'reject':
+        material_query = material_query.with_for_update()
+    materials = {material.id: material for material in material_query.populate_existing()}
+    available = {material_id: material.current_stock for material_id, material in materials.items()}
+    
+    # Whole seconds, so the claim below can find its own rows again on MySQL DATETIME columns
+    now = datetime.utcnow().replace(microsecond=0)
+    processed = []
+    short_of_stock = 0
+    for request_obj in sorted(selected, key=lambda r: (r.request_date, r.id)):
+        if action != 'reject':
+            # Earlier requests in the batch for the same material have already taken their share
+            quantity = request_obj.quantity_requested if action == 'approve' else request_obj.quantity_approved
+            if quantity > available[request_obj.material_id]:
+                short_of_stock += 1
+                continue
+            available[request_obj.material_id] -= quantity
+        processed.append(request_obj)
+    
+    # Claim the requests with one conditional UPDATE, as issue_material() does for a single
+    # request: rows a concurrent batch or single action moved on first are left out, and only
+    # the rows this UPDATE claimed (re-selected by status, actor and time) go any further
+    if action == 'issue':
+        actor, stamp = MaterialRequest.issued_by, MaterialRequest.issued_date
+    else:
+        actor, stamp = MaterialRequest.approved_by, MaterialRequest.approved_date
+    claim = {MaterialRequest.status: new_status, actor: current_user.id, stamp: now}
+    if action == 'approve':
+        claim[MaterialRequest.quantity_approved] = MaterialRequest.quantity_requested
+    if action != 'issue':
+        claim[MaterialRequest.remarks] = remarks
+    
+    candidate_ids = [request_obj.id for request_obj in processed]
+    if candidate_ids:
+        MaterialRequest.query.filter(
+            MaterialRequest.id.in_(candidate_ids), MaterialRequest.status == required_status
+        ).update(claim, synchronize_session=False)
+        processed = MaterialRequest.query.options(db.selectinload(MaterialRequest.requester)).filter(
+            MaterialRequest.id.in_(candidate_ids), MaterialRequest.status == new_status, actor == current_user.id, stamp == now
+        ).order_by(MaterialRequest.request_date, MaterialRequest.id).populate_existing().all()
+    
+    if action == 'issue':
+        # One conditional stock UPDATE per material for the whole batch
+        issued_totals = {}
+        for request_obj in processed:
+            issued_totals[request_obj.material_id] = issued_totals.get(request_obj.material_id, 0) + request_obj.quantity_approved
+        for material_id, total in issued_totals.items():
+            if not adjust_stock(materials[material_id], -total):
+                # Hand the claimed requests of this material back
+                unissued = [r.id for r in processed if r.material_id == material_id]
+                MaterialRequest.query.filter(MaterialRequest.id.in_(unissued)).update({
+                    MaterialRequest.status: required_status, MaterialRequest.issued_by: None, MaterialRequest.issued_date: None
+                }, synchronize_session=False)
+                short_of_stock += len(unissued)
+                processed = [r for r in processed if r.material_id != material_id]
+    
+    if action == 'issue' and processed:
+        db.session.execute(db.insert(Transaction), [{
+            'material_id': request_obj.material_id,
+            'user_id': current_user.id,
+            'transaction_type': 'issue',
+            'quantity': -request_obj.quantity_approved,
+            'unit_price': materials[request_obj.material_id].unit_price,
+            'reference_number': f"REQ-{request_obj.id}",
+            'purpose': request_obj.purpose,
+            'remarks': f"Issued to {request_obj.requester.username} ({request_obj.requester.department})",
+            'transaction_date': now
+        } for request_obj in processed])
+    
+    # One summary notification per requester instead of one email per request
+    by_requester = {}
+    for request_obj in processed:
+        by_requester.setdefault(request_obj.requester, []).append(request_obj)
+    
+    for requester, requester_requests in by_requester.items():
+        subject = f"Material Requests {done} - {len(requester_requests)} request(s)"
+        body = f"The following material requests have been {done.lower()} by {current_user.username}:\n\n"
+        for request_obj in requester_requests:
+            material = materials[request_obj.material_id]
+            quantity = request_obj.quantity_requested if action == 'reject' else request_obj.quantity_approved
+            body += f"• REQ-{request_obj.id}: {material.material_number} - {material.description}\n"
+            body += f"  Quantity: {quantity} {material.unit}\n"
+        if remarks and action != 'issue':
+            body += f"\n{'Reason' if action == 'reject' else 'Remarks'}: {remarks}\n"
+        if action == 'approve':
+            body += "\nPlease collect the materials from the store.\n"
+        elif action == 'reject':
+            body += "\nPlease contact your manager for more information.\n"
+        body += "\nBest regards,\nABB Store Management System"
+        queue_email(requester.email, subject, body)
+    
+    db.session.commit()
+    
+    skipped = len(request_ids) - len(processed)
+    flash(f'{len(processed)} request(s) {done.lower()}.', 'success' if processed else 'warning')
+    if skipped:
+        flash(f'{skipped} request(s) skipped: {short_of_stock} for insufficient stock, '
+              f'{skipped - short_of_stock} not {required_status}.', 'warning')
+    return redirect(url_for('main.material_requests', status=request.form.get('status_filter', '')))
+
+@bp.route('/transactions')
 @login_required
 def transactions():
-    page = request.args.get('page', 1, type=int)
     transaction_type = request.args.get('type', '')
+    start, end = date_range_args()
     
-    query = Transaction.query
-    
-    if transaction_type:
-        query = query.filter_by(transaction_type=transaction_type)
+    transactions = transactions_page(transaction_type, request.args.get('cursor'), current_app.config['PER_PAGE'], start, end)
     
-    transactions = query.order_by(Transaction.transaction_date.desc()).paginate(
-        page=page, per_page=20, error_out=False
+    return render_template('transactions.html', transactions=transactions, transaction_type=transaction_type,
+                           start=request.args.get('start', '') if start else '', end=request.args.get('end', '') if end else '')
+
+@bp.route('/transactions/export')
+@login_required
+def export_transactions():
+    file_format = 'xlsx' if request.args.get('format') == 'xlsx' else 'csv'
+    transaction_type = request.args.get('type', '')
+    start, end = date_range_args()
+    criteria = transaction_filters(transaction_type, start, end)
+    
+    statement = db.select(*[column for _, column in TRANSACTION_EXPORT_COLUMNS]).join(
+        Material, Transaction.material_id == Material.id
+    ).join(
+        User, Transaction.user_id == User.id
+    ).where(*criteria).order_by(Transaction.transaction_date.desc(), Transaction.id.desc())
+    
+    # Archived months follow the table's rows; their files have the same columns under the archive's names
+    archived = transaction_archive.batches(
+        archived_months(start, end),
+        ['username' if label == 'user' else label for label, _ in TRANSACTION_EXPORT_COLUMNS],
+        current_app.config['EXPORT_BATCH_SIZE'],
+        start=start, end=end, transaction_type=transaction_type
     )
+    batches = itertools.chain(stream_export_rows(statement), archived)
     
-    return render_template('transactions.html', transactions=transactions, transaction_type=transaction_type)
+    return export_response(TRANSACTION_EXPORT_COLUMNS, statement, 'transactions', file_format, batches)
 
-@app.route('/reports')
+@bp.route('/reports')
 @login_required
 def reports():
     if not current_user.is_manager():
         flash('Access denied. Manager privileges required.', 'danger')
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
     
     # Stock summary
     total_materials = Material.query.filter_by(is_active=True).count()
     low_stock_materials = Material.query.filter(
-        Material.current_stock <= Material.minimum_stock,
+        Material.low_stock == True,
         Material.is_active == True
     ).all()
     
@@ -740,13 +2480,15 @@ def reports():
         db.func.sum(Material.current_stock * Material.unit_price).label('value')
     ).filter_by(is_active=True).group_by(Material.category).all()
     
-    # Monthly transaction summary
+    # Monthly transaction summary, read from the incrementally maintained rollup
     monthly_stats = db.session.query(
-        db.func.strftime('%Y-%m', Transaction.transaction_date).label('month'),
-        Transaction.transaction_type,
-        db.func.count(Transaction.id).label('count'),
-        db.func.sum(Transaction.quantity * Transaction.unit_price).label('value')
-    ).group_by('month', Transaction.transaction_type).order_by('month').all()
+        TransactionMonthlySummary.month,
+        TransactionMonthlySummary.transaction_type,
+        db.func.sum(TransactionMonthlySummary.count).label('count'),
+        db.func.sum(TransactionMonthlySummary.value).label('value')
+    ).group_by(
+        TransactionMonthlySummary.month, TransactionMonthlySummary.transaction_type
+    ).order_by(TransactionMonthlySummary.month).all()
     
     return render_template('reports.html',
                          total_materials=total_materials,
@@ -754,12 +2496,77 @@ def reports():
                          category_stats=category_stats,
                          monthly_stats=monthly_stats)
 
-@app.route('/users')
+@bp.route('/stock/as-of')
+@login_required
+def stock_as_of():
+    if not current_user.is_manager():
+        flash('Access denied. Manager privileges required.', 'danger')
+        return redirect(url_for('main.dashboard'))
+    
+    as_of = as_of_date_arg()
+    if as_of is None:
+        flash('Enter the date as YYYY-MM-DD.', 'warning')
+        return redirect(url_for('main.stock_as_of'))
+    day, moment = as_of
+    category = request.args.get('category', '')
+    material_number = request.args.get('material', '').strip()
+    
+    materials, checkpoint = stock_as_of_page(
+        moment, category, material_number, request.args.get('cursor'), current_app.config['PER_PAGE']
+    )
+    
+    categories = db.session.query(Material.category).distinct().filter(
+        Material.category.isnot(None), Material.is_active == True
+    ).all()
+    categories = [cat[0] for cat in categories if cat[0]]
+    
+    return render_template('stock_as_of.html', materials=materials, checkpoint=checkpoint, day=day,
+                           category=category, material_number=material_number, categories=categories)
+
+@bp.route('/stock/as-of/export')
+@login_required
+def export_stock_as_of():
+    if not current_user.is_manager():
+        flash('Access denied. Manager privileges required.', 'danger')
+        return redirect(url_for('main.dashboard'))
+    
+    as_of = as_of_date_arg()
+    if as_of is None:
+        flash('Enter the date as YYYY-MM-DD.', 'warning')
+        return redirect(url_for('main.stock_as_of'))
+    day, moment = as_of
+    file_format = 'xlsx' if request.args.get('format') == 'xlsx' else 'csv'
+    stock, checkpoint = stock_as_of_column(moment)
+    
+    columns = [
+        ('material_number', Material.material_number),
+        ('description', Material.description),
+        ('category', Material.category),
+        ('unit', Material.unit),
+        (f'stock_{day:%Y%m%d}', stock),
+        ('current_stock', Material.current_stock)
+    ]
+    statement = db.select(*[column for _, column in columns]).where(
+        *material_filters(request.args.get('category', ''))
+    ).order_by(Material.material_number)
+    
+    # As in stock_as_of_page(), archived transactions since the checkpoint are added per material
+    batches = None
+    movements = archived_movements(checkpoint, moment)
+    if movements:
+        batches = (
+            [(*row[:4], row.stock_as_of + movements.get(row.id, 0), *row[5:-1]) for row in batch]
+            for batch in stream_export_rows(statement.add_columns(Material.id))
+        )
+    
+    return export_response(columns, statement, f'stock_{day:%Y%m%d}', file_format, batches)
+
+@bp.route('/users')
 @login_required
 def users():
     if not current_user.is_admin():
         flash('Access denied. Administrator privileges required.', 'danger')
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
     
     page = request.args.get('page', 1, type=int)
     users = User.query.order_by(User.username).paginate(
@@ -768,12 +2575,29 @@ def users():
     
     return render_template('users.html', users=users)
 
-@app.route('/users/add', methods=['GET', 'POST'])
+@bp.route('/admin/sql-profiles')
+@login_required
+def sql_profiler():
+    if not current_user.is_admin():
+        flash('Access denied. Administrator privileges required.', 'danger')
+        return redirect(url_for('main.dashboard'))
+    
+    flagged_only = request.args.get('flagged') == '1'
+    return render_template(
+        'sql_profiles.html',
+        profiles=sql_profiles.recent(flagged_only),
+        flagged_only=flagged_only,
+        enabled=current_app.config['SQL_PROFILER_ENABLED'],
+        slow_ms=current_app.config['SQL_PROFILER_SLOW_MS'],
+        repeat_threshold=current_app.config['SQL_PROFILER_REPEAT_THRESHOLD']
+    )
+
+@bp.route('/users/add', methods=['GET', 'POST'])
 @login_required
 def add_user():
     if not current_user.is_admin():
         flash('Access denied. Administrator privileges required.', 'danger')
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
     
     form = UserRegistrationForm()
     if form.validate_on_submit():
@@ -790,25 +2614,27 @@ def add_user():
         db.session.commit()
         
         flash(f'User {user.username} created successfully!', 'success')
-        return redirect(url_for('users'))
+        return redirect(url_for('main.users'))
     
     return render_template('user_form.html', form=form, title='Add User')
 
-@app.route('/upload', methods=['GET', 'POST'])
+@bp.route('/upload', methods=['GET', 'POST'])
 @login_required
 def upload_materials():
     if not current_user.is_manager():
         flash('Access denied. Manager privileges required.', 'danger')
-        return redirect(url_for('materials'))
+        return redirect(url_for('main.materials'))
     
     form = FileUploadForm()
     if form.validate_on_submit():
         file = form.file.data
         filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+        os.makedirs(current_app.config['UPLOAD_FOLDER'], exist_ok=True)
+        filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
         file.save(filepath)
         
         try:
+            import pandas as pd  # heavy; only the upload route needs it
             df = pd.read_excel(filepath)
             
             # Expected columns: material_number, description, category, unit, current_stock, minimum_stock, unit_price, location
@@ -816,77 +2642,27 @@ def upload_materials():
             
             if not all(col in df.columns for col in required_columns):
                 flash(f'Excel file must contain columns: {", ".join(required_columns)}', 'danger')
-                return redirect(url_for('upload_materials'))
+                return redirect(url_for('main.upload_materials'))
             
             success_count = 0
             error_count = 0
+            chunk_size = current_app.config['UPLOAD_CHUNK_SIZE']
             
-            for index, row in df.iterrows():
-                try:
-                    material = Material.query.filter_by(material_number=row['material_number']).first()
-                    
-                    if material:
-                        # Update existing material
-                        old_stock = material.current_stock
-                        material.current_stock = float(row['current_stock'])
-                        material.description = row['description']
-                        material.category = row.get('category', material.category)
-                        material.unit = row.get('unit', material.unit)
-                        material.minimum_stock = float(row.get('minimum_stock', material.minimum_stock))
-                        material.unit_price = float(row.get('unit_price', material.unit_price))
-                        material.location = row.get('location', material.location)
-                        material.last_updated = datetime.utcnow()
-                        
-                        # Log stock adjustment
-                        if old_stock != material.current_stock:
-                            transaction = Transaction(
-                                material_id=material.id,
-                                user_id=current_user.id,
-                                transaction_type='adjust',
-                                quantity=material.current_stock - old_stock,
-                                unit_price=material.unit_price,
-                                purpose='Bulk upload adjustment',
-                                remarks=f'Stock updated via Excel upload'
-                            )
-                            db.session.add(transaction)
-                    else:
-                        # Create new material
-                        material = Material(
-                            material_number=row['material_number'],
-                            description=row['description'],
-                            category=row.get('category', ''),
-                            unit=row.get('unit', 'PCS'),
-                            current_stock=float(row['current_stock']),
-                            minimum_stock=float(row.get('minimum_stock', 10)),
-                            unit_price=float(row.get('unit_price', 0)),
-                            location=row.get('location', '')
-                        )
-                        db.session.add(material)
-                        db.session.flush()  # Get the ID
-                        
-                        # Log initial stock
-                        transaction = Transaction(
-                            material_id=material.id,
-                            user_id=current_user.id,
-                            transaction_type='receive',
-                            quantity=material.current_stock,
-                            unit_price=material.unit_price,
-                            purpose='Initial stock via upload',
-                            remarks='Material added via Excel upload'
-                        )
-                        db.session.add(transaction)
-                    
-                    success_count += 1
-                    
-                except Exception as e:
-                    error_count += 1
-                    app.logger.error(f"Error processing row {index}: {str(e)}")
+            for start in range(0, len(df), chunk_size):
+                records = df.iloc[start:start + chunk_size].to_dict('records')
+                processed, failed = import_material_rows(records, start, current_user.id)
+                success_count += processed
+                error_count += failed
             
             db.session.commit()
+            metrics.inc('abb_store_import_rows_total', success_count, outcome='processed')
+            metrics.inc('abb_store_import_rows_total', error_count, outcome='failed')
+            metrics.inc('abb_store_jobs_total', job='import', outcome='ok')
             
             flash(f'Upload completed! {success_count} materials processed successfully. {error_count} errors.', 'success')
             
         except Exception as e:
+            metrics.inc('abb_store_jobs_total', job='import', outcome='error')
             flash(f'Error processing file: {str(e)}', 'danger')
         
         finally:
@@ -894,20 +2670,152 @@ def upload_materials():
             if os.path.exists(filepath):
                 os.remove(filepath)
         
-        return redirect(url_for('materials'))
+        return redirect(url_for('main.materials'))
     
     return render_template('upload.html', form=form)
 
-@app.route('/api/low-stock-check')
+@bp.route('/api/low-stock-check')
 @login_required
 def api_low_stock_check():
     if not current_user.is_manager():
         return jsonify({'error': 'Access denied'}), 403
     
-    send_low_stock_alerts()
-    return jsonify({'message': 'Low stock alerts sent successfully'})
+    # Without the background worker (LOW_STOCK_WORKER_ENABLED off) the digest runs once in the request
+    if not current_app.config['LOW_STOCK_WORKER_ENABLED']:
+        went_low, recovered = send_low_stock_alerts()
+        return jsonify({'message': 'Low stock digest queued', 'went_low': went_low, 'recovered': recovered})
+    
+    # The digest runs on the background worker; the request returns straight away
+    start_low_stock_worker()
+    low_stock_worker.wake()
+    return jsonify({'message': 'Low stock digest scheduled'}), 202
+
+@bp.route('/api/requests')
+@login_required
+def api_material_requests():
+    page = material_requests_page(request.args.get('status', ''), request.args.get('cursor'), per_page_arg())
+    return jsonify(page_to_dict(page, request_to_dict))
+
+@bp.route('/api/transactions')
+@login_required
+def api_transactions():
+    start, end = date_range_args()
+    page = transactions_page(request.args.get('type', ''), request.args.get('cursor'), per_page_arg(), start, end)
+    return jsonify(page_to_dict(page, transaction_to_dict))
+
+@bp.route('/api/stock/as-of')
+@login_required
+def api_stock_as_of():
+    if not current_user.is_manager():
+        return jsonify({'error': 'Access denied'}), 403
+    
+    as_of = as_of_date_arg()
+    if as_of is None:
+        return jsonify({'error': 'date must be YYYY-MM-DD'}), 400
+    day, moment = as_of
+    
+    page, checkpoint = stock_as_of_page(
+        moment, request.args.get('category', ''), request.args.get('material_number', '').strip(),
+        request.args.get('cursor'), per_page_arg()
+    )
+    return jsonify({
+        'date': day.isoformat(),
+        'as_of': moment.isoformat(),
+        'checkpoint': checkpoint.isoformat() if checkpoint else None,
+        **page_to_dict(page, stock_row_to_dict)
+    })
+
+@bp.route('/api/materials')
+@login_required
+def api_materials():
+    fields = [name.strip() for name in request.args.get('fields', '').split(',') if name.strip()] or list(MATERIAL_API_FIELDS)
+    unknown = [name for name in fields if name not in MATERIAL_API_FIELDS]
+    if unknown:
+        return jsonify({'error': f"Unknown field(s): {', '.join(unknown)}"}), 400
+    
+    query = db.session.query(Material.id).filter(*material_filters(request.args.get('category', '')))
+    query, _ = apply_material_search(query, request.args.get('search', ''))
+    
+    etag, last_modified, total = material_validators(query)
+    if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        # Client copy is current: skip the page query and serialization entirely
+        response = Response(status=304)
+    else:
+        columns = [MATERIAL_API_FIELDS[name] for name in fields if name != 'id']
+        page = paginator.paginate(
+            query.add_columns(*columns), [Material.id],
+            cursor=request.args.get('cursor'), per_page=per_page_arg(), total=total
+        )
+        response = jsonify(page_to_dict(page, lambda row: material_row_to_dict(row, fields)))
+    
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+@bp.route('/api/materials/lookup', methods=['POST'])
+@csrf.exempt  # read-only; lets handheld scanners post JSON without a form token
+@login_required
+def api_material_lookup():
+    """Resolve a batch of scanned material numbers with one indexed IN query"""
+    payload = request.get_json(silent=True)
+    numbers = payload.get('material_numbers') if isinstance(payload, dict) else payload
+    if not isinstance(numbers, list):
+        return jsonify({'error': 'Expected a JSON list of material numbers or {"material_numbers": [...]}'}), 400
+    
+    numbers = list(dict.fromkeys(str(number).strip() for number in numbers if str(number).strip()))
+    if len(numbers) > current_app.config['LOOKUP_MAX_NUMBERS']:
+        return jsonify({'error': f"At most {current_app.config['LOOKUP_MAX_NUMBERS']} material numbers per lookup"}), 400
+    
+    found = {
+        material.material_number: material
+        for material in db.session.query(
+            Material.id, Material.material_number, Material.description, Material.unit,
+            Material.current_stock, Material.low_stock, Material.location,
+            Material.rack_number, Material.bin_number
+        ).filter(Material.material_number.in_(numbers), Material.is_active == True)
+    } if numbers else {}
+    
+    return jsonify({
+        'materials': [{
+            'id': material.id,
+            'material_number': material.material_number,
+            'description': material.description,
+            'unit': material.unit,
+            'current_stock': material.current_stock,
+            'location': material.location,
+            'rack_number': material.rack_number,
+            'bin_number': material.bin_number,
+            'is_low_stock': material.low_stock
+        } for material in (found[number] for number in numbers if number in found)],
+        'not_found': [number for number in numbers if number not in found]
+    })
 
-@app.route('/api/material/<int:id>')
+@bp.route('/api/materials/search')
+@login_required
+def api_material_search():
+    search = request.args.get('q', '').strip()
+    limit = max(1, min(request.args.get('limit', 10, type=int), 50))
+    
+    if not search:
+        return jsonify([])
+    
+    query = db.session.query(
+        Material.id, Material.material_number, Material.description, Material.unit, Material.current_stock
+    ).filter(Material.is_active == True)
+    query, order = apply_material_search(query, search)
+    
+    return jsonify([{
+        'id': material.id,
+        'material_number': material.material_number,
+        'description': material.description,
+        'unit': material.unit,
+        'current_stock': material.current_stock
+    } for material in query.order_by(*order).limit(limit)])
+
+@bp.route('/api/material/<int:id>')
 @login_required
 def api_material_details(id):
     material = Material.query.get_or_404(id)
@@ -922,19 +2830,87 @@ def api_material_details(id):
     })
 
 # Error handlers
-@app.errorhandler(404)
+@bp.app_errorhandler(404)
 def not_found_error(error):
     return render_template('errors/404.html'), 404
 
-@app.errorhandler(500)
+@bp.app_errorhandler(500)
 def internal_error(error):
     db.session.rollback()
     return render_template('errors/500.html'), 500
 
-@app.errorhandler(403)
+@bp.app_errorhandler(403)
 def forbidden_error(error):
     return render_template('errors/403.html'), 403
 
+# Synthetic data for load testing
+SEEDED_MODELS = [User, Material, MaterialRequest, Transaction]  # in foreign key order
+
+def seed_warehouse(connection, scale, seed, password):
+    """Bulk load a generated warehouse (see seeding.py) into empty tables; returns row counts per table"""
+    from seeding import generate_warehouse, bulk_insert
+    
+    # Hashed once and shared, scrypt per generated user would dominate the run
+    tables = generate_warehouse(scale, seed, password_hasher.hash(password), datetime.utcnow())
+    
+    # On SQLite, building the secondary indexes once after the load is about twice as fast as
+    # maintaining them row by row. MySQL keeps them: there an index may back a foreign key.
+    indexes = [index for model in SEEDED_MODELS for index in model.__table__.indexes] if connection.dialect.name == 'sqlite' else []
+    for index in indexes:
+        index.drop(connection, checkfirst=True)
+    counts = {model.__tablename__: bulk_insert(connection, model.__tablename__, tables[model.__tablename__]) for model in SEEDED_MODELS}
+    for index in indexes:
+        index.create(connection)
+    
+    rebuild_transaction_rollup(connection)
+    build_stock_checkpoints(connection)
+    return counts
+
+def unreconciled_materials(connection):
+    """Number of materials whose current_stock differs from the sum of their transactions"""
+    ledger = db.select(
+        Transaction.material_id, db.func.sum(Transaction.quantity).label('quantity')
+    ).group_by(Transaction.material_id).subquery()
+    return connection.execute(db.select(db.func.count()).select_from(Material).outerjoin(
+        ledger, ledger.c.material_id == Material.id
+    ).where(Material.current_stock != db.func.coalesce(ledger.c.quantity, 0))).scalar()
+
+@bp.cli.command('seed')
+@click.option('--scale', type=float, default=0.1, show_default=True, help='1.0 = 100k materials, 1M requests, 5M transactions')
+@click.option('--seed', 'random_seed', type=int, default=42, show_default=True, help='Random seed; the same seed gives the same data')
+@click.option('--password', default='changeme123', show_default=True, help='Password of every generated user')
+@click.option('--replace', is_flag=True, help='Delete existing users, materials, requests, transactions and archived transactions first')
+def seed_command(scale, random_seed, password, replace):
+    """Generate users, materials, requests and a reconciled transaction ledger with bulk inserts."""
+    db.create_all()
+    migrations.upgrade(db.engine)
+    
+    started = time.perf_counter()
+    archived_paths = []
+    with db.engine.begin() as connection:
+        if any(connection.execute(db.select(db.func.count()).select_from(model)).scalar()
+               for model in SEEDED_MODELS + [TransactionArchiveSummary]):
+            if not replace:
+                raise click.ClickException("The database already has data; pass --replace to delete it first")
+            archived_paths = connection.execute(db.select(TransactionArchiveSummary.path).distinct()).scalars().all()
+            for model in [TransactionArchiveSummary, LowStockAlert, StockCheckpoint, EmailOutbox] + SEEDED_MODELS[::-1]:
+                connection.execute(db.delete(model.__table__))
+        counts = seed_warehouse(connection, scale, random_seed, password)
+        unreconciled = unreconciled_materials(connection)
+    
+    # Only once the old summaries are gone for good: until then they still point at these files
+    for path in archived_paths:
+        transaction_archive.remove(path)
+    if archived_paths:
+        print(f"Removed {len(archived_paths)} archived transaction file(s) from {current_app.config['TRANSACTION_ARCHIVE_DIR']}")
+    
+    print(f"Seeded {', '.join(f'{count:,} {table}' for table, count in counts.items())} "
+          f"in {time.perf_counter() - started:.1f}s")
+    if unreconciled:
+        raise click.ClickException(f"{unreconciled} material(s) do not reconcile with their transactions")
+    print(f"Ledger reconciles with current_stock for all {counts['materials']:,} materials; "
+          f"log in as admin / {password}")
+
 # Initialize database
 def init_db():
     """Initialize database connection and verify tables exist"""
@@ -961,13 +2937,80 @@ def init_db():
             print("Please run the database setup scripts")
         else:
             print("All required tables found")
+            migrations.upgrade(db.engine)
+            print(f"Material search backend: {search_backend()}")
             
     except Exception as e:
         print(f"Database connection error: {str(e)}")
         print("Please check your MySQL connection settings")
 
+@bp.cli.command('compile-templates')
+def compile_templates_command():
+    """Compile every template into TEMPLATE_CACHE_DIR so new workers skip Jinja compilation."""
+    if not current_app.config['TEMPLATE_CACHE_DIR']:
+        print("TEMPLATE_CACHE_DIR is not set; nothing to compile")
+        return
+    names = current_app.jinja_env.list_templates()
+    for name in names:
+        current_app.jinja_env.get_template(name)
+    print(f"Compiled {len(names)} templates into {current_app.config['TEMPLATE_CACHE_DIR']}")
+
+# Application factory
+def create_app(config_name=None, overrides=None):
+    """Build the app from a config.py profile (FLASK_CONFIG, then 'default'), with ``overrides`` applied on top"""
+    app = Flask(__name__)
+    app.config.from_object(config[config_name or os.getenv('FLASK_CONFIG', 'default')])
+    app.config.update(overrides or {})
+    if make_url(app.config['SQLALCHEMY_DATABASE_URI']).get_backend_name() == 'mysql':
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {**app.config['MYSQL_ENGINE_OPTIONS'], **app.config['SQLALCHEMY_ENGINE_OPTIONS']}
+    
+    # Compiled templates are cached on disk and shared by every worker process
+    if app.config['TEMPLATE_CACHE_DIR']:
+        os.makedirs(app.config['TEMPLATE_CACHE_DIR'], exist_ok=True)
+        app.jinja_options = {**app.jinja_options, 'bytecode_cache': FileSystemBytecodeCache(app.config['TEMPLATE_CACHE_DIR'])}
+    
+    db.init_app(app)
+    login_manager.init_app(app)
+    csrf.init_app(app)
+    
+    app.extensions['abb_store'] = {
+        'cache': create_cache(app.config['CACHE_BACKEND'], app.config['CACHE_URL'], app.config['CACHE_MAX_ENTRIES'],
+                              app.config['CACHE_CLIENT']),
+        'user_cache': LRUCache(max_entries=app.config['CACHE_MAX_ENTRIES']),
+        'paginator': KeysetPaginator(app.config['SECRET_KEY']),
+        'password_hasher': PasswordHasher(
+            app.config['PASSWORD_SCRYPT_N'],
+            app.config['PASSWORD_SCRYPT_R'],
+            app.config['PASSWORD_SCRYPT_P'],
+            workers=app.config['PASSWORD_POOL_WORKERS'],
+            max_pending=app.config['PASSWORD_POOL_MAX_PENDING'],
+            timeout=app.config['PASSWORD_HASH_TIMEOUT']
+        ),
+        'smtp_pool': SMTPConnectionPool(
+            app.config['SMTP_SERVER'],
+            app.config['SMTP_PORT'],
+            username=app.config['SMTP_USERNAME'],
+            password=app.config['SMTP_PASSWORD'],
+            use_tls=app.config['SMTP_USE_TLS'],
+            size=app.config['OUTBOX_POOL_SIZE']
+        ),
+        'outbox_worker': BackgroundWorker(
+            'email-outbox', lambda: run_outbox_worker(app), app.config['OUTBOX_POLL_INTERVAL']
+        ),
+        'low_stock_worker': BackgroundWorker(
+            'low-stock-digest', lambda: run_low_stock_digest(app), app.config['LOW_STOCK_DIGEST_INTERVAL']
+        ),
+        'metrics': create_metrics(),
+        'sql_profiles': ProfileHistory(app.config['SQL_PROFILER_HISTORY']),
+        'transaction_archive': ParquetArchive(app.config['TRANSACTION_ARCHIVE_DIR'], app.config['TRANSACTION_ARCHIVE_COMPRESSION'])
+    }
+    
+    app.register_blueprint(bp)
+    return app
+
 if __name__ == '__main__':
     try:
+        app = create_app()
         with app.app_context():
             init_db()
         print("Starting ABB Store Management System...")
@@ -0,0 +1,135 @@
+import os
+import uuid
+
+
+def archive_schema():
+    """Columns of an archived transaction; material and user details are copied in when a
+    month is archived, so the files can be read without joining back to the database"""
+    import pyarrow as pa
+
+    return pa.schema([
+        ('id', pa.int64()),
+        ('transaction_date', pa.timestamp('us')),
+        ('material_id', pa.int64()),
+        ('material_number', pa.string()),
+        ('description', pa.string()),
+        ('category', pa.string()),
+        ('unit', pa.string()),
+        ('transaction_type', pa.string()),
+        ('quantity', pa.decimal128(12, 2)),
+        ('unit_price', pa.decimal128(12, 2)),
+        ('user_id', pa.int64()),
+        ('username', pa.string()),
+        ('reference_number', pa.string()),
+        ('purpose', pa.string()),
+        ('remarks', pa.string())
+    ])
+
+
+class ParquetArchive:
+    """Transactions moved out of the database into compressed Parquet files.
+
+    Each archival run writes one file per month under ``<root>/month=YYYY-MM/``,
+    sorted by (transaction_date, id). The database records which files are live,
+    and callers pass those paths in, so a file left behind by a run that failed
+    before committing is never read. pyarrow is imported on first use.
+    """
+
+    def __init__(self, root, compression='zstd'):
+        self.root = root
+        self.compression = compression
+
+    def write(self, month, batches):
+        """Write batches of row dicts for one month; returns (path relative to the root, rows written)"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        relative = f'month={month}/part-{uuid.uuid4().hex}.parquet'
+        path = os.path.join(self.root, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        schema = archive_schema()
+        written = 0
+        try:
+            with pq.ParquetWriter(path + '.tmp', schema, compression=self.compression) as writer:
+                for batch in batches:
+                    writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                    written += len(batch)
+            os.replace(path + '.tmp', path)
+        except BaseException:
+            if os.path.exists(path + '.tmp'):
+                os.remove(path + '.tmp')
+            raise
+        return relative, written
+
+    def remove(self, relative):
+        path = os.path.join(self.root, relative)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def read(self, paths, columns=None, start=None, end=None, transaction_type=None):
+        """One table of the rows in ``paths`` within [start, end) and of ``transaction_type``, if given"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        filters = []
+        if start is not None:
+            filters.append(('transaction_date', '>=', start))
+        if end is not None:
+            filters.append(('transaction_date', '<', end))
+        if transaction_type:
+            filters.append(('transaction_type', '=', transaction_type))
+
+        tables = [
+            pq.read_table(os.path.join(self.root, path), columns=columns, filters=filters or None)
+            for path in paths
+        ]
+        if not tables:
+            schema = archive_schema()
+            return schema.empty_table().select(columns) if columns else schema.empty_table()
+        return pa.concat_tables(tables)
+
+    def page(self, months, values, newer, limit, **filters):
+        """Up to ``limit`` rows (as dicts) past the (transaction_date, id) key ``values``, nearest first.
+
+        ``months`` is [(month, paths)] newest first; months wholly on the far
+        side of the key are skipped without being read, and reading stops once
+        ``limit`` rows are found.
+        """
+        import pyarrow.compute as pc
+
+        order = 'ascending' if newer else 'descending'
+        if newer:
+            months = list(reversed(months))
+        key_month = f'{values[0]:%Y-%m}' if values else None
+
+        rows = []
+        for month, paths in months:
+            if key_month and (month < key_month if newer else month > key_month):
+                continue
+            table = self.read(paths, **filters)
+            if values:
+                beyond = pc.greater if newer else pc.less
+                date, id_ = values
+                table = table.filter(pc.or_(
+                    beyond(table['transaction_date'], date),
+                    pc.and_(pc.equal(table['transaction_date'], date), beyond(table['id'], id_))
+                ))
+            table = table.sort_by([('transaction_date', order), ('id', order)]).slice(0, limit - len(rows))
+            rows.extend(table.to_pylist())
+            if len(rows) >= limit:
+                break
+        return rows
+
+    def batches(self, months, columns, batch_size=1000, **filters):
+        """Yield rows as tuples of ``columns`` in batches, newest first; ``months`` as for page()"""
+        for _, paths in months:
+            table = self.read(paths, **filters).sort_by([('transaction_date', 'descending'), ('id', 'descending')])
+            for batch in table.select(columns).to_batches(max_chunksize=batch_size):
+                yield list(zip(*[batch.column(column).to_pylist() for column in columns]))
+
+    def net_quantities(self, paths, start=None, end=None):
+        """Summed quantity per material_id over the rows in ``paths`` within [start, end)"""
+        table = self.read(paths, columns=['material_id', 'quantity', 'transaction_date'], start=start, end=end)
+        totals = table.group_by('material_id').aggregate([('quantity', 'sum')])
+        return dict(zip(totals['material_id'].to_pylist(), totals['quantity_sum'].to_pylist()))
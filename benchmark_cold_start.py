@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Cold Start Benchmark for ABB Store Management System
+Starts fresh interpreters that import the app and build it with create_app(),
+and reports where the startup time goes, module by module (python -X importtime).
+
+Usage: python3 benchmark_cold_start.py [--config production] [--runs 5] [--top 20]
+
+Nothing is connected to or written in the database; create_app() only configures
+the engine. Exits non-zero if a module that must stay off the startup path
+(pandas, openpyxl, smtplib) shows up in the import graph.
+"""
+
+import os
+import re
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+# Modules that only specific routes need; importing them at startup is a regression
+LAZY_MODULES = ['pandas', 'openpyxl', 'smtplib', 'numpy', 'pyarrow']
+
+STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.create_app(sys.argv[1])
+created = time.perf_counter()
+print(json.dumps({'import': imported - start, 'create_app': created - imported}))
+"""
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$')
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Cold start import/create_app benchmark')
+    parser.add_argument('--config', default='production', help='config.py profile passed to create_app()')
+    parser.add_argument('--runs', type=int, default=5, help='fresh interpreters to start')
+    parser.add_argument('--top', type=int, default=20, help='slowest modules to list')
+    return parser.parse_args()
+
+def cold_start(config_name):
+    """Run one fresh interpreter; returns (timings, {module: (self_us, cumulative_us)}, app's direct imports)"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', STARTUP_SCRIPT, config_name],
+        cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        print(result.stderr)
+        sys.exit(1)
+    
+    # importtime prints a module after everything it imported, indented one level deeper
+    modules = {}
+    children = []
+    app_imports = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            depth = (len(indent) - 1) // 2
+            modules[name] = (int(self_us), int(cumulative_us))
+            if depth == 1:
+                children.append(name)
+            elif depth == 0:
+                if name == 'app':
+                    app_imports = children
+                children = []
+    return json.loads(result.stdout.strip().splitlines()[-1]), modules, app_imports
+
+def main():
+    args = parse_args()
+    
+    print("=" * 50)
+    print("ABB Store Management - Cold Start Benchmark")
+    print("=" * 50)
+    print(f"Starting {args.runs} fresh interpreters with create_app('{args.config}')...")
+    
+    timings = []
+    samples = {}
+    app_imports = set()
+    for _ in range(args.runs):
+        timing, modules, direct = cold_start(args.config)
+        timings.append(timing)
+        app_imports.update(direct)
+        for name, times in modules.items():
+            samples.setdefault(name, []).append(times)
+    
+    import_ms = statistics.median(t['import'] for t in timings) * 1000
+    create_ms = statistics.median(t['create_app'] for t in timings) * 1000
+    
+    print(f"\n   import app:   {import_ms:8.1f} ms (median)")
+    print(f"   create_app(): {create_ms:8.1f} ms (median)")
+    print(f"   total:        {import_ms + create_ms:8.1f} ms")
+    
+    # Modules imported directly by app.py partition its import time between them;
+    # a shared dependency is charged to whichever module imported it first
+    direct = [
+        (name, statistics.median(c for _, c in samples[name]), statistics.median(s for s, _ in samples[name]))
+        for name in app_imports
+    ]
+    direct.sort(key=lambda item: item[1], reverse=True)
+    app_self = statistics.median(s for s, _ in samples['app'])
+    
+    print(f"\nSlowest imports made by app.py (median of {args.runs}, milliseconds):")
+    print(f"   {'module':<40} {'cumulative':>10} {'self':>8}")
+    for name, cumulative_us, self_us in direct[:args.top]:
+        print(f"   {name:<40} {cumulative_us / 1000:>10.1f} {self_us / 1000:>8.1f}")
+    print(f"   {'app (module body)':<40} {app_self / 1000:>10.1f} {app_self / 1000:>8.1f}")
+    
+    loaded = [name for name in LAZY_MODULES if name in samples]
+    print()
+    if loaded:
+        for name in loaded:
+            print(f"❌ {name} is imported at startup")
+        sys.exit(1)
+    print(f"✅ None of {', '.join(LAZY_MODULES)} imported at startup")
+
+if __name__ == '__main__':
+    main()
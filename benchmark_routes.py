@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Route Benchmark Suite for ABB Store Management System
+Seeds a SQLite database with the warehouse `flask seed` generates (100k materials, 1M requests and
+5M transactions at --scale 1), drives the main routes through the Flask test client
+and reports p50/p95 latency, SQL statements and peak memory per route.
+
+Usage: python3 benchmark_routes.py [--scale 1] [--seed 42] [--iterations 20] [--save-baseline]
+
+The seeded database is built once per scale/seed under --data-dir and copied
+before each run, so routes that write (upload) never skew the next run. Results are
+compared with --baseline when it was recorded at the same scale; a route whose p95
+grows by more than --tolerance, or that runs more SQL statements, fails the run.
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import resource
+import statistics
+import tempfile
+import tracemalloc
+from datetime import datetime
+
+from sqlalchemy import event
+
+from app import create_app, db, migrations, seed_warehouse, Material
+
+SEED_PASSWORD = 'bench123'
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Route benchmark against a seeded warehouse')
+    parser.add_argument('--scale', type=float, default=1.0, help='1.0 = 100k materials, 1M requests, 5M transactions')
+    parser.add_argument('--seed', type=int, default=42, help='random seed for the generated warehouse')
+    parser.add_argument('--iterations', type=int, default=20, help='timed requests per route')
+    parser.add_argument('--warm-cache', action='store_true', help='keep cached dashboard stats and list counts between requests')
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'abb-store-bench'),
+                        help='where seeded databases are kept')
+    parser.add_argument('--baseline', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json'))
+    parser.add_argument('--save-baseline', action='store_true', help='store these results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed p95 growth over the baseline (0.25 = 25%%)')
+    return parser.parse_args()
+
+def seeded_database(args):
+    """Path of a seeded database for this scale and seed, building it on first use"""
+    os.makedirs(args.data_dir, exist_ok=True)
+    path = os.path.join(args.data_dir, f'warehouse-{args.scale:g}-{args.seed}.db')
+    if os.path.exists(path):
+        return path
+    
+    building = path + '.building'
+    if os.path.exists(building):
+        os.remove(building)
+    app = create_app('testing', {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{building}'})
+    print(f"Seeding {path} (one-off)...")
+    started = time.perf_counter()
+    with app.app_context():
+        db.create_all()
+        migrations.upgrade(db.engine, log=lambda message: None)
+        with db.engine.begin() as connection:
+            connection.exec_driver_sql('PRAGMA journal_mode=OFF')
+            connection.exec_driver_sql('PRAGMA synchronous=OFF')
+            counts = seed_warehouse(connection, args.scale, args.seed, SEED_PASSWORD)
+        with db.engine.connect() as connection:
+            connection.exec_driver_sql('ANALYZE')
+        db.engine.dispose()
+    os.rename(building, path)
+    print(f"   {', '.join(f'{count:,} {name}' for name, count in counts.items())} in {time.perf_counter() - started:.0f}s")
+    return path
+
+def upload_file(material_numbers):
+    """An Excel sheet updating existing materials, as a buyer's stock sheet would"""
+    import pandas as pd
+    
+    rng = random.Random(0)
+    frame = pd.DataFrame([
+        {'material_number': number, 'description': f'Updated {number}', 'current_stock': rng.randint(0, 500),
+         'minimum_stock': 10, 'unit_price': 12.5, 'location': 'WH-1'}
+        for number in material_numbers
+    ])
+    buffer = io.BytesIO()
+    frame.to_excel(buffer, index=False)
+    return buffer.getvalue()
+
+def benchmark_routes(material_count):
+    """(name, request function) for every benchmarked route"""
+    rng = random.Random(1)
+    numbers = [f'MAT-{rng.randint(1, material_count):07d}' for _ in range(200)]
+    sheet = upload_file(numbers)
+    
+    return [
+        ('dashboard', lambda client: client.get('/dashboard')),
+        ('materials', lambda client: client.get('/materials')),
+        ('materials: search', lambda client: client.get('/materials?search=contactor')),
+        ('materials: category', lambda client: client.get('/materials?category=Relays')),
+        ('material_requests', lambda client: client.get('/requests')),
+        ('material_requests: pending', lambda client: client.get('/requests?status=pending')),
+        ('transactions', lambda client: client.get('/transactions')),
+        ('transactions: issue', lambda client: client.get('/transactions?type=issue')),
+        ('reports', lambda client: client.get('/reports')),
+        ('upload_materials: 200 rows', lambda client: client.post(
+            '/upload', data={'file': (io.BytesIO(sheet), 'stock.xlsx')}, content_type='multipart/form-data'
+        )),
+        ('api: materials', lambda client: client.get('/api/materials?per_page=100')),
+        ('api: materials search', lambda client: client.get('/api/materials/search?q=relay')),
+        ('api: material lookup', lambda client: client.post('/api/materials/lookup', json={'material_numbers': numbers[:100]})),
+        ('api: material details', lambda client: client.get(f'/api/material/{rng.randint(1, material_count)}')),
+        ('api: requests', lambda client: client.get('/api/requests')),
+        ('api: transactions', lambda client: client.get('/api/transactions')),
+    ]
+
+def run(args, database):
+    work = os.path.join(args.data_dir, 'work.db')
+    shutil.copyfile(database, work)
+    app = create_app('testing', {
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{work}',
+        'UPLOAD_FOLDER': os.path.join(args.data_dir, 'uploads'),
+        'METRICS_ENABLED': False
+    })
+    
+    results = {}
+    with app.app_context():
+        material_count = db.session.query(db.func.max(Material.id)).scalar()
+        statements = {'count': 0}
+        
+        @event.listens_for(db.engine, 'before_cursor_execute')
+        def count_statement(*args):
+            statements['count'] += 1
+    
+    cache = app.extensions['abb_store']['cache']
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = '1'
+        session['_fresh'] = True
+    
+    for name, send in benchmark_routes(material_count):
+        send(client)  # warm-up: first-use imports, template compilation, SQLite page cache
+        
+        timings = []
+        counts = []
+        for _ in range(args.iterations):
+            if not args.warm_cache:
+                cache.clear()
+            statements['count'] = 0
+            started = time.perf_counter()
+            response = send(client)
+            timings.append(time.perf_counter() - started)
+            counts.append(statements['count'])
+            if response.status_code >= 400:
+                print(f"❌ {name}: HTTP {response.status_code}")
+                sys.exit(1)
+        
+        # Memory is measured on one extra request; tracemalloc would distort the timings
+        if not args.warm_cache:
+            cache.clear()
+        tracemalloc.start()
+        send(client)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        
+        timings.sort()
+        results[name] = {
+            'p50_ms': round(statistics.median(timings) * 1000, 2),
+            'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000, 2),
+            'queries': max(counts),
+            'peak_kib': round(peak / 1024)
+        }
+    
+    with app.app_context():
+        db.engine.dispose()
+    os.remove(work)
+    return results
+
+def compare(results, baseline, tolerance):
+    """Print the results next to the baseline; returns the names of regressed routes"""
+    regressions = []
+    print(f"\n   {'route':<30} {'p50 ms':>9} {'p95 ms':>9} {'queries':>8} {'peak KiB':>9}   vs baseline")
+    for name, result in results.items():
+        line = f"   {name:<30} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} {result['queries']:>8} {result['peak_kib']:>9}"
+        previous = baseline.get(name) if baseline else None
+        if previous:
+            change = (result['p95_ms'] - previous['p95_ms']) / previous['p95_ms'] if previous['p95_ms'] else 0
+            line += f"   p95 {change:+.0%}, queries {result['queries'] - previous['queries']:+d}"
+            if change > tolerance or result['queries'] > previous['queries']:
+                regressions.append(name)
+                line += "  ❌"
+        print(line)
+    return regressions
+
+def main():
+    args = parse_args()
+    
+    print("=" * 50)
+    print("ABB Store Management - Route Benchmark")
+    print("=" * 50)
+    
+    database = seeded_database(args)
+    print(f"Running {args.iterations} requests per route against {database}...")
+    results = run(args, database)
+    
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as stored:
+            saved = json.load(stored)
+        if saved.get('scale') == args.scale and saved.get('seed') == args.seed:
+            baseline = saved['routes']
+            print(f"Comparing with baseline from {saved['recorded_at']} ({saved['platform']})")
+        else:
+            print(f"Baseline was recorded at scale {saved.get('scale')} / seed {saved.get('seed')}; not comparing")
+    
+    regressions = compare(results, baseline, args.tolerance)
+    print(f"\n   Peak RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MiB")
+    
+    if args.save_baseline:
+        with open(args.baseline, 'w') as stored:
+            json.dump({
+                'scale': args.scale, 'seed': args.seed, 'iterations': args.iterations,
+                'recorded_at': datetime.utcnow().isoformat(timespec='seconds'),
+                'platform': f"{platform.python_implementation()} {platform.python_version()} on {platform.platform()}",
+                'routes': results
+            }, stored, indent=2)
+        print(f"✅ Baseline saved to {args.baseline}")
+    
+    if regressions:
+        print(f"❌ {len(regressions)} route(s) slower than the baseline or running more queries: {', '.join(regressions)}")
+        sys.exit(1)
+    if baseline:
+        print("✅ No route regressed against the baseline")
+
+if __name__ == '__main__':
+    main()
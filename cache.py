@@ -0,0 +1,120 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class LRUCache:
+    """In-process cache with per-entry TTL and least-recently-used eviction.
+
+    Each gunicorn worker holds its own copy, so an invalidation is only seen by
+    the worker that performed the write; other workers fall back to the TTL.
+    """
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+class SharedCache:
+    """Cache stored in a shared key-value server so every worker sees the same invalidations.
+
+    ``client`` needs these Redis methods: ``get(key)`` returning bytes or
+    None, ``set(key, value, ex=seconds or None)``, ``delete(*keys)`` and
+    ``scan_iter(pattern)`` (used by clear()). Any object providing them, such
+    as a local stand-in during development, can replace a real connection.
+    """
+
+    def __init__(self, client, prefix='abb:'):
+        self.client = client
+        self.prefix = prefix
+        # Counted per worker; the server only knows its own totals
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_url(cls, url, prefix='abb:'):
+        import redis
+        return cls(redis.Redis.from_url(url), prefix=prefix)
+
+    def get(self, key, default=None):
+        raw = self.client.get(self.prefix + key)
+        if raw is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return pickle.loads(raw)
+
+    def set(self, key, value, ttl=None):
+        self.client.set(self.prefix + key, pickle.dumps(value), ex=ttl or None)
+
+    def delete(self, *keys):
+        if keys:
+            self.client.delete(*[self.prefix + key for key in keys])
+
+    def clear(self):
+        keys = list(self.client.scan_iter(self.prefix + '*'))
+        if keys:
+            self.client.delete(*keys)
+
+    def stats(self):
+        return {'entries': None, 'hits': self.hits, 'misses': self.misses}
+
+
+def create_cache(backend='lru', url=None, max_entries=1024, client=None):
+    """Build the cache backend named in configuration; a shared backend uses ``client`` when given, else ``url``"""
+    if backend == 'lru':
+        return LRUCache(max_entries=max_entries)
+    if backend in ('redis', 'shared'):
+        return SharedCache(client) if client is not None else SharedCache.from_url(url)
+    raise ValueError(f"Unknown cache backend: {backend}")
+
+
+def get_or_set(cache, key, compute, ttl=None):
+    """Return the cached value for ``key``, computing and storing it on a miss"""
+    value = cache.get(key, _MISSING)
+    if value is _MISSING:
+        value = compute()
+        cache.set(key, value, ttl)
+    return value
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -20,7 +21,10 @@ class Config:
     
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_ENGINE_OPTIONS = {
-        'pool_pre_ping': True,
+        'pool_pre_ping': True
+    }
+    # Pool and PyMySQL driver options, added by create_app() only when the URI is a MySQL one
+    MYSQL_ENGINE_OPTIONS = {
         'pool_recycle': 300,
         'pool_timeout': 20,
         'pool_size': 10,
@@ -36,6 +40,12 @@ class Config:
     # File Upload Configuration
     UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER', 'uploads')
     MAX_CONTENT_LENGTH = int(os.getenv('MAX_CONTENT_LENGTH', 16777216))  # 16MB
+    UPLOAD_CHUNK_SIZE = int(os.getenv('UPLOAD_CHUNK_SIZE', 500))  # rows per bulk lookup/write
+    
+    # Bulk Operation Configuration
+    EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', 1000))  # rows fetched per cursor round trip
+    BATCH_MAX_REQUESTS = int(os.getenv('BATCH_MAX_REQUESTS', 500))  # requests per batch approve/reject/issue
+    LOOKUP_MAX_NUMBERS = int(os.getenv('LOOKUP_MAX_NUMBERS', 500))  # material numbers per scanner lookup
     
     # Email Configuration
     SMTP_SERVER = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
@@ -44,6 +54,63 @@ class Config:
     SMTP_PASSWORD = os.getenv('SMTP_PASSWORD')
     SMTP_USE_TLS = os.getenv('SMTP_USE_TLS', 'True').lower() == 'true'
     
+    # Email Outbox Configuration
+    OUTBOX_WORKER_ENABLED = os.getenv('OUTBOX_WORKER_ENABLED', 'True').lower() == 'true'
+    OUTBOX_POOL_SIZE = int(os.getenv('OUTBOX_POOL_SIZE', 2))  # concurrent SMTP sessions
+    OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', 50))
+    OUTBOX_POLL_INTERVAL = int(os.getenv('OUTBOX_POLL_INTERVAL', 30))  # seconds
+    OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', 5))
+    OUTBOX_RETRY_BASE = int(os.getenv('OUTBOX_RETRY_BASE', 30))  # seconds, doubled per attempt
+    OUTBOX_RETRY_CAP = int(os.getenv('OUTBOX_RETRY_CAP', 3600))
+    OUTBOX_CLAIM_TIMEOUT = int(os.getenv('OUTBOX_CLAIM_TIMEOUT', 600))  # reclaim stuck 'sending' rows
+    
+    # Low Stock Digest Configuration
+    LOW_STOCK_WORKER_ENABLED = os.getenv('LOW_STOCK_WORKER_ENABLED', 'True').lower() == 'true'
+    LOW_STOCK_DIGEST_INTERVAL = int(os.getenv('LOW_STOCK_DIGEST_INTERVAL', 3600))  # seconds between digests
+    
+    # Password Hashing Configuration (scrypt:N:r:p, as written by password-generator.py)
+    PASSWORD_SCRYPT_N = int(os.getenv('PASSWORD_SCRYPT_N', 32768))
+    PASSWORD_SCRYPT_R = int(os.getenv('PASSWORD_SCRYPT_R', 8))
+    PASSWORD_SCRYPT_P = int(os.getenv('PASSWORD_SCRYPT_P', 1))
+    PASSWORD_POOL_WORKERS = int(os.getenv('PASSWORD_POOL_WORKERS', 2))  # processes per worker; 0 hashes inline
+    PASSWORD_POOL_MAX_PENDING = int(os.getenv('PASSWORD_POOL_MAX_PENDING', 32))  # queued hashes before logins are turned away
+    PASSWORD_HASH_TIMEOUT = int(os.getenv('PASSWORD_HASH_TIMEOUT', 10))  # seconds
+    
+    # Cache Configuration
+    CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'lru')  # 'lru' (per worker) or 'redis' (shared)
+    CACHE_URL = os.getenv('CACHE_URL', 'redis://localhost:6379/0')
+    CACHE_CLIENT = None  # Redis-compatible client object for the shared backend (see cache.SharedCache); overrides CACHE_URL
+    CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', 1024))
+    DASHBOARD_CACHE_TTL = int(os.getenv('DASHBOARD_CACHE_TTL', 60))  # seconds
+    USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', 30))  # seconds a user change may take to reach other workers
+    
+    # Pagination Configuration
+    PER_PAGE = 20
+    MAX_PER_PAGE = 100
+    COUNT_CACHE_TTL = int(os.getenv('COUNT_CACHE_TTL', 300))  # seconds a list total may be stale
+    
+    # Transaction Archive Configuration (flask archive-transactions)
+    TRANSACTION_ARCHIVE_DIR = os.getenv('TRANSACTION_ARCHIVE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'archive'))
+    TRANSACTION_ARCHIVE_HORIZON_DAYS = int(os.getenv('TRANSACTION_ARCHIVE_HORIZON_DAYS', 365))  # whole months older than this move to Parquet
+    TRANSACTION_ARCHIVE_COMPRESSION = os.getenv('TRANSACTION_ARCHIVE_COMPRESSION', 'zstd')
+    
+    # Material Search Configuration
+    SEARCH_MIN_TOKEN_SIZE = int(os.getenv('SEARCH_MIN_TOKEN_SIZE', 3))  # MySQL innodb_ft_min_token_size
+    
+    # Metrics Configuration
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True').lower() == 'true'
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')  # when set, /metrics requires 'Authorization: Bearer <token>'
+    
+    # SQL Profiler Configuration (opt-in; results at /admin/sql-profiles and in the log)
+    SQL_PROFILER_ENABLED = os.getenv('SQL_PROFILER_ENABLED', 'False').lower() == 'true'
+    SQL_PROFILER_SLOW_MS = int(os.getenv('SQL_PROFILER_SLOW_MS', 100))  # statements at or above this are flagged slow
+    SQL_PROFILER_REPEAT_THRESHOLD = int(os.getenv('SQL_PROFILER_REPEAT_THRESHOLD', 5))  # same shape this often in one request suggests N+1
+    SQL_PROFILER_HISTORY = int(os.getenv('SQL_PROFILER_HISTORY', 300))  # requests kept per worker
+    
+    # Template Configuration
+    # Compiled templates are kept on disk so a cold start skips Jinja compilation; empty disables
+    TEMPLATE_CACHE_DIR = os.getenv('TEMPLATE_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'abb-store-templates'))
+    
     # Security Configuration
     WTF_CSRF_ENABLED = os.getenv('WTF_CSRF_ENABLED', 'True').lower() == 'true'
     WTF_CSRF_TIME_LIMIT = int(os.getenv('WTF_CSRF_TIME_LIMIT', 3600))
@@ -55,10 +122,11 @@ class DevelopmentConfig(Config):
 class ProductionConfig(Config):
     DEBUG = False
     FLASK_ENV = 'production'
+    TEMPLATES_AUTO_RELOAD = False
     
     # Production-specific settings
-    SQLALCHEMY_ENGINE_OPTIONS = {
-        **Config.SQLALCHEMY_ENGINE_OPTIONS,
+    MYSQL_ENGINE_OPTIONS = {
+        **Config.MYSQL_ENGINE_OPTIONS,
         'pool_size': 20,
         'max_overflow': 30,
     }
@@ -66,7 +134,11 @@ class ProductionConfig(Config):
 class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
     WTF_CSRF_ENABLED = False
+    OUTBOX_WORKER_ENABLED = False
+    LOW_STOCK_WORKER_ENABLED = False
+    PASSWORD_POOL_WORKERS = 0
 
 # Configuration dictionary
 config = {
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Concurrent Issue Load Test for ABB Store Management System
+Fires hundreds of parallel issue requests at a single material and checks that
+stock never goes negative and that the transaction ledger balances exactly.
+
+Usage: python3 load_test.py [--requests 300] [--stock 100] [--quantity 1] [--workers 32]
+
+Runs against the database configured in .env. Everything it creates is removed
+afterwards unless --keep is given.
+"""
+
+import sys
+import uuid
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from app import (
+    create_app, db, User, Material, MaterialRequest, Transaction, EmailOutbox, LowStockAlert, StockCheckpoint,
+    TransactionMonthlySummary, upsert_transaction_rollup
+)
+
+LOAD_TEST_CATEGORY = 'Load Test'
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Concurrent stock issue load test')
+    parser.add_argument('--requests', type=int, default=300, help='approved requests to issue')
+    parser.add_argument('--stock', type=int, default=100, help='starting stock of the test material')
+    parser.add_argument('--quantity', type=int, default=1, help='quantity approved per request')
+    parser.add_argument('--workers', type=int, default=32, help='parallel clients')
+    parser.add_argument('--repeat', type=int, default=2, help='times each request is posted (duplicates must be rejected)')
+    parser.add_argument('--keep', action='store_true', help='keep the test material, requests and transactions')
+    return parser.parse_args()
+
+def setup(args):
+    """Create a test material and approved requests against it"""
+    manager = User.query.filter(User.role.in_(['admin', 'manager']), User.is_active == True).first()
+    if manager is None:
+        print("❌ No active admin or manager user found")
+        sys.exit(1)
+    
+    material = Material(
+        material_number=f"LOADTEST-{uuid.uuid4().hex[:8].upper()}",
+        description='Load test material',
+        category=LOAD_TEST_CATEGORY,
+        current_stock=args.stock,
+        minimum_stock=0,
+        unit_price=1
+    )
+    db.session.add(material)
+    db.session.flush()
+    
+    requests = [
+        MaterialRequest(
+            material_id=material.id,
+            user_id=manager.id,
+            quantity_requested=args.quantity,
+            quantity_approved=args.quantity,
+            purpose='Load test',
+            status='approved',
+            approved_by=manager.id
+        )
+        for _ in range(args.requests)
+    ]
+    db.session.add_all(requests)
+    db.session.commit()
+    
+    return manager.id, material.id, material.material_number, [r.id for r in requests]
+
+def run_load(app, manager_id, request_ids, args):
+    """Post every issue request ``repeat`` times from ``workers`` parallel clients"""
+    local = threading.local()
+    
+    def issue(request_id):
+        client = getattr(local, 'client', None)
+        if client is None:
+            client = local.client = app.test_client()
+            with client.session_transaction() as session:
+                session['_user_id'] = str(manager_id)
+                session['_fresh'] = True
+        return client.post(f'/requests/{request_id}/issue').status_code
+    
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        return list(executor.map(issue, request_ids * args.repeat))
+
+def verify(material_id, request_ids, args, statuses):
+    """Check the ledger against the final stock level; returns a list of failures"""
+    db.session.expire_all()
+    material = db.session.get(Material, material_id)
+    final_stock = Decimal(material.current_stock)
+    
+    issued = MaterialRequest.query.filter(
+        MaterialRequest.id.in_(request_ids), MaterialRequest.status == 'issued'
+    ).count()
+    transaction_count, ledger_total = db.session.query(
+        db.func.count(Transaction.id), db.func.coalesce(db.func.sum(Transaction.quantity), 0)
+    ).filter(Transaction.material_id == material_id).one()
+    
+    errors = sum(1 for status in statuses if status >= 500)
+    expected_issued = min(args.requests, args.stock // args.quantity)
+    
+    print(f"   Requests posted: {len(statuses)} ({errors} server errors)")
+    print(f"   Requests issued: {issued} (expected {expected_issued})")
+    print(f"   Stock: {args.stock} -> {final_stock}")
+    print(f"   Ledger: {transaction_count} transactions totalling {ledger_total}")
+    
+    failures = []
+    if final_stock < 0:
+        failures.append(f"stock went negative ({final_stock})")
+    if Decimal(args.stock) - issued * args.quantity != final_stock:
+        failures.append("stock does not match the number of issued requests")
+    if Decimal(ledger_total) != final_stock - args.stock:
+        failures.append("transaction ledger does not balance with the stock change")
+    if transaction_count != issued:
+        failures.append("issued requests and issue transactions differ (double issue?)")
+    if errors == 0 and issued != expected_issued:
+        failures.append("some requests were refused although stock was available")
+    return failures
+
+def remove_from_rollup(material_id):
+    """Subtract the test material's transactions from the monthly rollup, leaving other rows' totals alone"""
+    deltas = {}
+    for transaction_type, quantity, unit_price, transaction_date in db.session.query(
+        Transaction.transaction_type, Transaction.quantity, Transaction.unit_price, Transaction.transaction_date
+    ).filter(Transaction.material_id == material_id):
+        key = (transaction_date.strftime('%Y-%m'), transaction_type, LOAD_TEST_CATEGORY)
+        count, value = deltas.get(key, (0, 0.0))
+        deltas[key] = (count - 1, value - float(quantity) * float(unit_price or 0))
+    upsert_transaction_rollup(db.session.connection(), deltas)
+    
+    # Rows the test run created on its own are now empty
+    for month, transaction_type, category in deltas:
+        TransactionMonthlySummary.query.filter_by(
+            month=month, transaction_type=transaction_type, category=category, count=0
+        ).delete(synchronize_session=False)
+
+def cleanup(material_id, material_number, request_ids):
+    """Remove everything the load test created, including its share of the rollup and queued emails"""
+    EmailOutbox.query.filter(EmailOutbox.subject.contains(material_number)).delete(synchronize_session=False)
+    remove_from_rollup(material_id)
+    Transaction.query.filter(Transaction.material_id == material_id).delete(synchronize_session=False)
+    MaterialRequest.query.filter(MaterialRequest.id.in_(request_ids)).delete(synchronize_session=False)
+    LowStockAlert.query.filter_by(material_id=material_id).delete(synchronize_session=False)
+    StockCheckpoint.query.filter_by(material_id=material_id).delete(synchronize_session=False)
+    Material.query.filter_by(id=material_id).delete(synchronize_session=False)
+    db.session.commit()
+
+def main():
+    args = parse_args()
+    app = create_app()
+    app.config.update(WTF_CSRF_ENABLED=False, OUTBOX_WORKER_ENABLED=False, LOW_STOCK_WORKER_ENABLED=False)
+    
+    print("=" * 50)
+    print("ABB Store Management - Concurrent Issue Load Test")
+    print("=" * 50)
+    
+    with app.app_context():
+        manager_id, material_id, material_number, request_ids = setup(args)
+        print(f"Issuing {args.requests} x {args.quantity} of {material_number} (stock {args.stock}) "
+              f"with {args.workers} workers, each request posted {args.repeat}x...")
+        
+        try:
+            statuses = run_load(app, manager_id, request_ids, args)
+            failures = verify(material_id, request_ids, args, statuses)
+        finally:
+            if not args.keep:
+                cleanup(material_id, material_number, request_ids)
+    
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        sys.exit(1)
+    print("✅ Stock and transaction ledger balance exactly")
+
+if __name__ == '__main__':
+    main()
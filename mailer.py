@@ -0,0 +1,149 @@
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+
+class SMTPConnectionPool:
+    """Keeps a small set of authenticated SMTP sessions open for reuse.
+
+    Connections are checked out with ``connection()``; a session that raises
+    is discarded instead of being returned, and idle sessions are probed with
+    NOOP before reuse so a server-side timeout does not fail the next send.
+    smtplib and the email package are imported on first use, so processes
+    that never send mail do not load them at startup.
+    """
+
+    def __init__(self, host, port, username=None, password=None, use_tls=True,
+                 size=2, timeout=30, max_idle=60, max_messages=100):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.size = size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.max_messages = max_messages
+        self._idle = queue.LifoQueue()
+
+    def _connect(self):
+        import smtplib
+
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.use_tls:
+            server.starttls()
+        if self.username:
+            server.login(self.username, self.password)
+        return server
+
+    def _acquire(self):
+        import smtplib
+
+        while True:
+            try:
+                server, last_used, sent = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect(), 0
+
+            if time.monotonic() - last_used < self.max_idle:
+                return server, sent
+            try:
+                if server.noop()[0] == 250:
+                    return server, sent
+            except smtplib.SMTPException:
+                pass
+            except OSError:
+                pass
+            self._discard(server)
+
+    def _discard(self, server):
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    @contextmanager
+    def connection(self):
+        server, sent = self._acquire()
+        try:
+            yield server
+        except Exception:
+            self._discard(server)
+            raise
+
+        sent += 1
+        if sent >= self.max_messages or self._idle.qsize() >= self.size:
+            self._discard(server)
+        else:
+            self._idle.put((server, time.monotonic(), sent))
+
+    def send(self, sender, to_email, subject, body):
+        """Send a plain-text message over a pooled session"""
+        from email.mime.multipart import MIMEMultipart
+        from email.mime.text import MIMEText
+
+        msg = MIMEMultipart()
+        msg['From'] = sender
+        msg['To'] = to_email
+        msg['Subject'] = subject
+        msg.attach(MIMEText(body, 'plain'))
+
+        with self.connection() as server:
+            server.sendmail(sender, to_email, msg.as_string())
+
+    def close(self):
+        while True:
+            try:
+                server, _, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._discard(server)
+
+
+def retry_delay(attempts, base=30, cap=3600):
+    """Exponential backoff in seconds for the given number of failed attempts"""
+    return min(base * 2 ** max(attempts - 1, 0), cap)
+
+
+class BackgroundWorker:
+    """Daemon thread that calls ``task`` every ``interval`` seconds or when woken"""
+
+    def __init__(self, name, task, interval=30):
+        self.name = name
+        self.task = task
+        self.interval = interval
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def wake(self):
+        self._wakeup.set()
+
+    def stop(self, timeout=None):
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.clear()
+            try:
+                self.task()
+            except Exception:
+                # The task is responsible for its own logging; keep the loop alive
+                pass
+            self._wakeup.wait(self.interval)
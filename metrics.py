@@ -0,0 +1,135 @@
+import bisect
+import threading
+import weakref
+
+# Prometheus client defaults, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class MetricsRegistry:
+    """Counters and histograms rendered in the Prometheus text format.
+
+    Every thread records into its own shard, so ``inc`` and ``observe`` are a
+    dict update with no lock; the shards are only summed when ``render()`` is
+    called by a scrape. Shards of finished threads are folded into one retired
+    shard whenever a new thread starts recording and on every scrape, so the
+    totals stay monotonic while only live threads keep a shard of their own.
+    Gauges are read from collector callbacks at scrape time. Each gunicorn
+    worker exposes its own totals.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._metrics = {}
+        self._collectors = []
+        self._shards = []  # (weak reference to the owning thread, shard)
+        self._retired = ({}, {})  # counts of threads that have finished
+        self._local = threading.local()
+        self._lock = threading.Lock()  # taken when a thread adds its shard and on scrape
+
+    def describe(self, name, kind, help_text):
+        self._metrics[name] = (kind, help_text)
+
+    def collector(self, name, kind, help_text, collect):
+        """Register ``collect()`` returning ``{labels: value}`` (labels as a tuple of pairs), called on every scrape"""
+        self.describe(name, kind, help_text)
+        self._collectors.append((name, collect))
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = ({}, {})
+            with self._lock:
+                self._retire_finished()
+                self._shards.append((weakref.ref(threading.current_thread()), shard))
+        return shard
+
+    def _retire_finished(self):
+        """Fold the shards of finished threads into the retired shard; the caller holds the lock"""
+        live = []
+        for owner, shard in self._shards:
+            thread = owner()
+            if thread is not None and thread.is_alive():
+                live.append((owner, shard))
+            else:
+                _merge_shard(self._retired, shard)
+        self._shards = live
+
+    def inc(self, name, value=1, **labels):
+        counters = self._shard()[0]
+        key = (name, tuple(labels.items()))
+        counters[key] = counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        histograms = self._shard()[1]
+        key = (name, tuple(labels.items()))
+        histogram = histograms.get(key)
+        if histogram is None:
+            # one slot per bucket, one for +Inf, then the running sum
+            histogram = histograms[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        histogram[bisect.bisect_left(self.buckets, value)] += 1
+        histogram[-1] += value
+
+    def snapshot(self):
+        """Sum every thread's shard; returns (counters, histograms)"""
+        totals = ({}, {})
+        with self._lock:
+            self._retire_finished()
+            _merge_shard(totals, self._retired)
+            shards = [shard for _, shard in self._shards]
+        for shard in shards:
+            _merge_shard(totals, shard)
+        return totals
+
+    def render(self):
+        counters, histograms = self.snapshot()
+        samples = {}
+        for (name, labels), value in counters.items():
+            samples.setdefault(name, []).append((name, labels, value))
+        for (name, labels), histogram in histograms.items():
+            lines = samples.setdefault(name, [])
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), histogram):
+                cumulative += count
+                lines.append((f'{name}_bucket', labels + (('le', _format_value(bound)),), cumulative))
+            lines.append((f'{name}_count', labels, cumulative))
+            lines.append((f'{name}_sum', labels, histogram[-1]))
+        for name, collect in self._collectors:
+            lines = samples.setdefault(name, [])
+            for labels, value in collect().items():
+                lines.append((name, labels, value))
+
+        output = []
+        for name in sorted(samples):
+            kind, help_text = self._metrics.get(name, ('untyped', ''))
+            output.append(f'# HELP {name} {help_text}')
+            output.append(f'# TYPE {name} {kind}')
+            for sample, labels, value in samples[name]:
+                output.append(f'{sample}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(output) + '\n'
+
+
+def _merge_shard(totals, shard):
+    """Add a shard's counters and histograms into ``totals``; the shard may still be written to by its thread"""
+    counters, histograms = totals
+    shard_counters, shard_histograms = shard
+    for key, value in shard_counters.copy().items():
+        counters[key] = counters.get(key, 0) + value
+    for key, histogram in shard_histograms.copy().items():
+        histogram = list(histogram)
+        total = histograms.get(key)
+        histograms[key] = histogram if total is None else [a + b for a, b in zip(total, histogram)]
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels) + '}'
+
+
+def _format_value(value):
+    return value if isinstance(value, str) else repr(value)
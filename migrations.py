@@ -0,0 +1,91 @@
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, select
+
+
+metadata = MetaData()
+
+schema_migrations = Table(
+    'schema_migrations', metadata,
+    Column('version', Integer, primary_key=True, autoincrement=False),
+    Column('description', String(200), nullable=False),
+    Column('applied_at', DateTime, nullable=False)
+)
+
+
+class MigrationRegistry:
+    """Ordered, versioned schema changes recorded in the schema_migrations table.
+
+    Each migration is a function taking a SQLAlchemy connection; it runs in its
+    own transaction and must be safe to re-run against a database that was set
+    up by hand (use checkfirst / IF NOT EXISTS).
+    """
+
+    def __init__(self):
+        self.migrations = {}
+
+    def migration(self, version, description):
+        def register(func):
+            if version in self.migrations:
+                raise ValueError(f"Duplicate migration version: {version}")
+            self.migrations[version] = (description, func)
+            return func
+        return register
+
+    def applied_versions(self, engine):
+        with engine.begin() as connection:
+            schema_migrations.create(connection, checkfirst=True)
+            return set(connection.execute(select(schema_migrations.c.version)).scalars())
+
+    def pending(self, engine):
+        applied = self.applied_versions(engine)
+        return [(version, self.migrations[version][0]) for version in sorted(self.migrations) if version not in applied]
+
+    def upgrade(self, engine, log=print):
+        """Apply all pending migrations in version order; returns the versions applied"""
+        applied = []
+        for version, description in self.pending(engine):
+            log(f"Applying migration {version}: {description}")
+            with engine.begin() as connection:
+                self.migrations[version][1](connection)
+                connection.execute(schema_migrations.insert().values(
+                    version=version, description=description, applied_at=datetime.utcnow()
+                ))
+            applied.append(version)
+        return applied
+
+
+def full_scans(connection, statement):
+    """Return the plan lines of ``statement`` that read a table without any index.
+
+    SQLite reports these as a bare ``SCAN <table>``; MySQL as access type ``ALL``.
+    Index-ordered and covering-index scans are not reported.
+    """
+    compiled = statement.compile(dialect=connection.dialect, compile_kwargs={'render_postcompile': True})
+    dialect = connection.dialect.name
+
+    if dialect == 'sqlite':
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", _positional(compiled))
+        problems = []
+        for row in rows:
+            detail = row[-1]
+            words = detail.split()
+            # 'SCAN <table>' with nothing after it; subquery/CTE scans carry no table name
+            if len(words) == 2 and words[0] == 'SCAN' and not words[1].startswith(('(', 'CONSTANT')):
+                problems.append(detail)
+        return problems
+
+    if dialect in ('mysql', 'mariadb'):
+        rows = connection.exec_driver_sql(f"EXPLAIN {compiled}", _positional(compiled)).mappings()
+        return [
+            f"{row['table']}: type=ALL rows={row['rows']}"
+            for row in rows
+            if row['type'] == 'ALL' and row['table'] and not row['table'].startswith('<')
+        ]
+
+    raise NotImplementedError(f"EXPLAIN check not supported for {dialect}")
+
+
+def _positional(compiled):
+    if compiled.positiontup is not None:
+        return tuple(compiled.params[name] for name in compiled.positiontup)
+    return compiled.params
@@ -0,0 +1,121 @@
+from datetime import datetime
+from itsdangerous import URLSafeSerializer, BadSignature
+from sqlalchemy import and_, or_
+
+
+class KeysetPage:
+    """One page of a keyset-paginated query, newest first"""
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None, per_page=20, total=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.per_page = per_page
+        self.total = total
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+
+class KeysetPaginator:
+    """Paginates on a unique, descending sort key such as (transaction_date, id).
+
+    Each page is fetched with a range predicate on the key instead of OFFSET,
+    so page 10,000 costs the same index seek as page 1. Cursors are signed
+    so clients treat them as opaque tokens.
+    """
+
+    def __init__(self, secret_key, salt='keyset-cursor'):
+        self.serializer = URLSafeSerializer(secret_key, salt=salt)
+
+    def encode(self, direction, values):
+        return self.serializer.dumps([direction, [
+            {'dt': value.isoformat()} if isinstance(value, datetime) else value
+            for value in values
+        ]])
+
+    def decode(self, token):
+        """Return (direction, values) for a cursor, or (None, None) if it is missing or invalid"""
+        if not token:
+            return None, None
+        try:
+            direction, values = self.serializer.loads(token)
+            values = [
+                datetime.fromisoformat(value['dt']) if isinstance(value, dict) else value
+                for value in values
+            ]
+        except (BadSignature, ValueError, TypeError, KeyError):
+            return None, None
+        if direction not in ('next', 'prev'):
+            return None, None
+        return direction, values
+
+    def paginate(self, query, columns, cursor=None, per_page=20, total=None):
+        def key(item):
+            return [getattr(item, column.key) for column in columns]
+
+        return self.paginate_sources([query_source(query, columns)], key, cursor, per_page, total)
+
+    def paginate_sources(self, sources, key, cursor=None, per_page=20, total=None):
+        """Paginate one descending sequence split across several sources.
+
+        ``sources`` hold disjoint key ranges and are ordered newest first, such
+        as the live table followed by an archive. Each is a callable
+        ``fetch(values, newer, limit)`` returning up to ``limit`` rows past the
+        key ``values`` (from the start when None), nearest first. A page is
+        topped up from the next source only when the current one runs out.
+        """
+        direction, values = self.decode(cursor)
+        newer = direction == 'prev'
+
+        rows = []
+        for fetch in (reversed(sources) if newer else sources):
+            rows.extend(fetch(values, newer, per_page + 1 - len(rows)))
+            if len(rows) > per_page:
+                break
+        has_more = len(rows) > per_page
+        rows = rows[:per_page]
+        if newer:
+            rows.reverse()
+
+        if direction == 'prev':
+            # Walking back towards newer rows: older rows always follow
+            has_next, has_prev = True, has_more
+        else:
+            has_next, has_prev = has_more, direction == 'next'
+
+        next_cursor = prev_cursor = None
+        if rows:
+            if has_next:
+                next_cursor = self.encode('next', key(rows[-1]))
+            if has_prev:
+                prev_cursor = self.encode('prev', key(rows[0]))
+
+        return KeysetPage(rows, next_cursor, prev_cursor, per_page, total)
+
+
+def query_source(query, columns):
+    """A paginate_sources() source reading ``query`` in keyset order on ``columns``"""
+    def fetch(values, newer, limit):
+        selected = query
+        if values is not None:
+            selected = selected.filter(keyset_condition(columns, values, newer))
+        order = [column.asc() if newer else column.desc() for column in columns]
+        return selected.order_by(*order).limit(limit).all()
+
+    return fetch
+
+
+def keyset_condition(columns, values, newer):
+    """Row-value comparison (c1, c2, ...) > / < (v1, v2, ...) spelled out for index-friendly SQL"""
+    clauses = []
+    for position, column in enumerate(columns):
+        equal = [columns[i] == values[i] for i in range(position)]
+        bound = column > values[position] if newer else column < values[position]
+        clauses.append(and_(*equal, bound))
+    return or_(*clauses)
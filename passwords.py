@@ -0,0 +1,117 @@
+import base64
+import hashlib
+import hmac
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when more hashing jobs are waiting than the pool is allowed to queue, or a job times out"""
+
+
+def hash_password(password, method):
+    return generate_password_hash(password, method=method)
+
+
+def verify_password(password_hash, password):
+    """Check a password against a ``scrypt:N:r:p$salt$hash`` string.
+
+    Accepts Werkzeug's layout (plain salt, hex digest) as well as the
+    base64 salt/digest layout written by password-generator.py.
+    """
+    try:
+        method, salt, digest = password_hash.split('$', 2)
+    except ValueError:
+        return False
+
+    try:
+        bytes.fromhex(digest)
+    except ValueError:
+        return _verify_base64_scrypt(method, salt, digest, password)
+    return check_password_hash(password_hash, password)
+
+
+def _verify_base64_scrypt(method, salt, digest, password):
+    try:
+        name, n, r, p = method.split(':')
+        n, r, p = int(n), int(r), int(p)
+        salt = base64.urlsafe_b64decode(salt + '=' * (-len(salt) % 4))
+        expected = base64.urlsafe_b64decode(digest + '=' * (-len(digest) % 4))
+    except ValueError:
+        return False
+    if name != 'scrypt':
+        return False
+
+    derived = hashlib.scrypt(password.encode('utf-8'), salt=salt, n=n, r=r, p=p,
+                             maxmem=132 * n * r * p, dklen=len(expected))
+    return hmac.compare_digest(derived, expected)
+
+
+class PasswordHasher:
+    """Runs scrypt hashing and verification in a small process pool.
+
+    Login bursts then queue for a few dedicated processes instead of pinning
+    every request thread on scrypt. At most ``max_pending`` jobs may wait per
+    worker; beyond that, or when a job takes longer than ``timeout`` seconds,
+    ``PasswordHasherBusy`` is raised so the caller can turn the request away.
+    With ``workers=0`` hashing runs inline.
+    """
+
+    def __init__(self, n=32768, r=8, p=1, workers=2, max_pending=32, timeout=10):
+        self.method = f"scrypt:{n}:{r}:{p}"
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        # Created on first use so each gunicorn worker gets its own pool after forking
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._executor
+
+    def _run(self, func, *args):
+        if not self.workers:
+            return func(*args)
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy()
+        try:
+            future = self._pool().submit(func, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise PasswordHasherBusy() from None
+
+    def hash(self, password):
+        return self._run(hash_password, password, self.method)
+
+    def verify(self, password_hash, password):
+        return self._run(verify_password, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """True when a stored hash was made with other parameters or another layout"""
+        method, _, rest = password_hash.partition('$')
+        if method != self.method:
+            return True
+        try:
+            bytes.fromhex(rest.partition('$')[2])
+        except ValueError:
+            return True
+        return False
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
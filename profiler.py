@@ -0,0 +1,103 @@
+import re
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+
+_WHITESPACE = re.compile(r'\s+')
+_IN_LIST = re.compile(r'\bIN \((?:\?|%s)(?:, ?(?:\?|%s))*\)', re.IGNORECASE)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+
+
+def statement_shape(statement):
+    """Reduce a statement to its shape so repeats with different values compare equal"""
+    shape = _WHITESPACE.sub(' ', statement).strip()
+    shape = _STRING.sub('?', shape)
+    shape = _NUMBER.sub('?', shape)
+    return _IN_LIST.sub('IN (...)', shape)
+
+
+def parameters_shape(parameters, executemany=False):
+    """Describe bound parameters by type only, so no values (passwords, emails) are kept"""
+    if executemany:
+        rows = list(parameters or ())
+        return f"{len(rows)} x {parameters_shape(rows[0])}" if rows else '0 rows'
+    if isinstance(parameters, dict):
+        return '{' + ', '.join(f'{key}: {type(value).__name__}' for key, value in parameters.items()) + '}'
+    if isinstance(parameters, (list, tuple)):
+        return '(' + ', '.join(type(value).__name__ for value in parameters) + ')'
+    return type(parameters).__name__
+
+
+class RequestProfile:
+    """Statements executed while serving one request, with N+1 and slow statement flags"""
+
+    def __init__(self, method, path, endpoint):
+        self.method = method
+        self.path = path
+        self.endpoint = endpoint
+        self.started_at = datetime.utcnow()
+        self.statements = []
+        self.status = None
+        self.seconds = None
+        self.repeated = []
+        self.slow = []
+        self._started = time.perf_counter()
+
+    def record(self, statement, parameters, executemany, seconds):
+        self.statements.append({
+            'shape': statement_shape(statement),
+            'parameters': parameters_shape(parameters, executemany),
+            'seconds': seconds
+        })
+
+    @property
+    def sql_seconds(self):
+        return sum(entry['seconds'] for entry in self.statements)
+
+    def finish(self, status, slow_seconds, repeat_threshold):
+        """Close the profile and flag repeated shapes and statements slower than ``slow_seconds``"""
+        self.status = status
+        self.seconds = time.perf_counter() - self._started
+        counts = Counter(entry['shape'] for entry in self.statements)
+        self.repeated = [(shape, count) for shape, count in counts.most_common() if count >= repeat_threshold]
+        self.slow = [entry for entry in self.statements if entry['seconds'] >= slow_seconds]
+        return self
+
+    @property
+    def flagged(self):
+        return bool(self.repeated or self.slow)
+
+    def summary(self):
+        """One log line: totals, then the worst repeated shape and slowest statement if any"""
+        line = (f"SQL profile {self.method} {self.path} -> {self.status}: {len(self.statements)} statements, "
+                f"{self.sql_seconds * 1000:.1f} ms SQL of {self.seconds * 1000:.1f} ms")
+        if self.repeated:
+            shape, count = self.repeated[0]
+            line += f"; N+1 suspect x{count}: {shape[:120]}"
+        if self.slow:
+            slowest = max(self.slow, key=lambda entry: entry['seconds'])
+            line += f"; slow {slowest['seconds'] * 1000:.1f} ms: {slowest['shape'][:120]}"
+        return line
+
+
+class ProfileHistory:
+    """The most recent request profiles of this process, newest first"""
+
+    def __init__(self, max_entries=300):
+        self._profiles = deque(maxlen=max_entries)
+        self._lock = threading.Lock()
+
+    def add(self, profile):
+        with self._lock:
+            self._profiles.appendleft(profile)
+
+    def recent(self, flagged_only=False):
+        with self._lock:
+            profiles = list(self._profiles)
+        return [profile for profile in profiles if profile.flagged] if flagged_only else profiles
+
+    def clear(self):
+        with self._lock:
+            self._profiles.clear()
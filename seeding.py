@@ -0,0 +1,228 @@
+from datetime import timedelta
+
+import numpy as np
+
+CATEGORIES = [
+    ('Circuit Breakers', 'PCS'), ('Contactors', 'PCS'), ('Cables', 'MTR'), ('Relays', 'PCS'),
+    ('Drives', 'PCS'), ('Motors', 'PCS'), ('Sensors', 'PCS'), ('Fasteners', 'BOX'),
+    ('PLC Modules', 'PCS'), ('Transformers', 'PCS'), ('Lubricants', 'LTR'), ('Switchgear Spares', 'SET')
+]
+ITEMS = ['Contactor', 'Breaker', 'Relay', 'Cable', 'Bolt', 'Nut', 'Washer', 'Bearing', 'Fuse', 'Terminal',
+         'Sensor', 'Coil', 'Gland', 'Lug', 'Busbar', 'Gasket', 'Filter', 'Fan', 'Module', 'Drive']
+QUALIFIERS = ['3-pole', '4-pole', '24V DC', '230V AC', 'M8', 'M10', 'M12', 'IP65', '16A', '32A', '63A',
+              'shielded', 'stainless', 'heavy duty', 'compact', 'panel mount']
+SUPPLIERS = ['ABB Ltd', 'Siemens', 'Schneider Electric', 'Phoenix Contact', 'Weidmuller', 'SKF',
+             'Legrand', 'Polycab', 'Havells', 'Rittal']
+PURPOSES = ['Line maintenance', 'Breakdown repair', 'Panel assembly', 'Preventive maintenance',
+            'Project work', 'Customer order', 'Testing']
+DEPARTMENTS = ['Stores', 'Maintenance', 'Production', 'Projects']
+STATUSES = ['pending', 'approved', 'rejected', 'issued']
+PRIORITIES = ['low', 'normal', 'high', 'urgent']
+TRANSACTION_TYPES = ['issue', 'receive', 'adjust', 'return']
+
+# Rows generated at scale 1.0
+SCALE_ROWS = {'users': 200, 'materials': 100000, 'material_requests': 1000000, 'transactions': 5000000}
+HISTORY_DAYS = 3 * 365
+CHUNK_SIZE = 20000
+
+STATUS_WEIGHTS = [0.05, 0.05, 0.10, 0.80]
+PRIORITY_WEIGHTS = [0.10, 0.70, 0.15, 0.05]
+# Ledger entries besides request issues and opening balances: (type, weight, smallest, largest quantity, reference prefix).
+# Sized so receipts and returns about match what issued requests take out, leaving stock near its opening level.
+MOVEMENTS = [('receive', 0.45, 1, 8, 'GRN'), ('adjust', 0.35, -5, 5, 'ADJ'), ('return', 0.20, 1, 2, 'RET')]
+
+# Datetimes are sent as seconds since the epoch and formatted by the database, which is far
+# cheaper than building millions of strings in Python. The SQLite text matches SQLAlchemy's format.
+EPOCH_SQL = {
+    'sqlite': "strftime('%Y-%m-%d %H:%M:%S.000000', {}, 'unixepoch')",
+    'mysql': "TIMESTAMPADD(SECOND, {}, '1970-01-01')",
+    'mariadb': "TIMESTAMPADD(SECOND, {}, '1970-01-01')"
+}
+
+
+def _labels(options, codes):
+    return [options[code] for code in codes.tolist()]
+
+
+def _pick(rng, options, size, weights=None):
+    return _labels(options, rng.choice(len(options), size, p=weights))
+
+
+def generate_warehouse(scale, seed, password_hash, now):
+    """Generate every table as {table: {column: values}}, ids numbered from 1.
+
+    Values are lists, numpy arrays, or datetime64 arrays (NaT for NULL).
+    Issued requests are booked as issue transactions, and each material gets
+    an opening balance receipt large enough that its running stock never goes
+    negative. current_stock is the sum of the material's ledger, so the two
+    reconcile exactly. The same scale and seed always give the same rows.
+    """
+    rng = np.random.default_rng(seed)
+    start = np.datetime64((now - timedelta(days=HISTORY_DAYS)).replace(microsecond=0), 's')
+    span = (HISTORY_DAYS - 3) * 86400  # the last request is still decided and issued before now
+    user_count = max(int(SCALE_ROWS['users'] * scale), 20) + 1
+    material_count = max(int(SCALE_ROWS['materials'] * scale), 100)
+    request_count = int(SCALE_ROWS['material_requests'] * scale)
+
+    # Users: one admin, every 20th user a manager
+    user_ids = np.arange(1, user_count + 1)
+    roles = ['admin'] + ['manager' if number % 20 == 0 else 'staff' for number in range(1, user_count)]
+    managers = user_ids[[role != 'staff' for role in roles]]
+    users = {
+        'id': user_ids,
+        'username': ['admin'] + [f'user{number:05d}' for number in range(1, user_count)],
+        'email': ['admin@abb-store.local'] + [f'user{number:05d}@abb-store.local' for number in range(1, user_count)],
+        'password_hash': [password_hash] * user_count,
+        'role': roles,
+        'department': _pick(rng, DEPARTMENTS, user_count),
+        'employee_id': [f'EMP{number:05d}' for number in range(user_count)],
+        'is_active': np.ones(user_count, dtype=bool),
+        'created_at': np.full(user_count, start)
+    }
+
+    # Requests, in date order so ids and request dates increase together
+    request_ids = np.arange(1, request_count + 1)
+    requested = np.sort(rng.integers(0, span, request_count))
+    status = rng.choice(len(STATUSES), request_count, p=STATUS_WEIGHTS)
+    decided = status != STATUSES.index('pending')
+    issued = status == STATUSES.index('issued')
+    quantity = rng.integers(1, 21, request_count)
+    decided_at = requested + rng.integers(3600, 48 * 3600, request_count)
+    approver = rng.choice(managers, request_count)
+    purposes = rng.integers(0, len(PURPOSES), request_count)
+    request_materials = rng.integers(1, material_count + 1, request_count)
+    requests = {
+        'id': request_ids,
+        'material_id': request_materials,
+        'user_id': rng.integers(1, user_count + 1, request_count),
+        'quantity_requested': quantity,
+        'quantity_approved': np.where(issued | (status == STATUSES.index('approved')), quantity, 0),
+        'purpose': _labels(PURPOSES, purposes),
+        'priority': _pick(rng, PRIORITIES, request_count, PRIORITY_WEIGHTS),
+        'status': _labels(STATUSES, status),
+        'request_date': start + requested,
+        'approved_date': np.where(decided, start + decided_at, np.datetime64('NaT')),
+        'approved_by': [manager if keep else None for manager, keep in zip(approver.tolist(), decided.tolist())],
+        'issued_date': np.where(issued, start + decided_at + 7200, np.datetime64('NaT')),
+        'issued_by': [manager if keep else None for manager, keep in zip(approver.tolist(), issued.tolist())]
+    }
+
+    # Ledger movements: one issue per issued request, then receipts, adjustments and returns
+    issue_count = int(issued.sum())
+    movement_count = max(int(SCALE_ROWS['transactions'] * scale) - issue_count - material_count, 0)
+    kinds = rng.choice(len(MOVEMENTS), movement_count, p=[weight for _, weight, _, _, _ in MOVEMENTS])
+    lowest = np.array([low for _, _, low, _, _ in MOVEMENTS])[kinds]
+    highest = np.array([high for _, _, _, high, _ in MOVEMENTS])[kinds]
+    moved = rng.integers(lowest, highest + 1)
+    moved[moved == 0] = 1
+    ledger_materials = np.concatenate([request_materials[issued], rng.integers(1, material_count + 1, movement_count)])
+    ledger_quantity = np.concatenate([-quantity[issued], moved])
+    ledger_seconds = np.concatenate([decided_at[issued] + 7200, rng.integers(1, span, movement_count)])
+
+    # Running stock per material in date order; the opening balance covers its lowest point
+    lowest_balance = np.zeros(material_count + 1, dtype=np.int64)
+    net_movement = np.zeros(material_count + 1, dtype=np.int64)
+    last_moved = np.zeros(material_count + 1, dtype=np.int64)
+    order = np.lexsort((ledger_seconds, ledger_materials))
+    if len(order):
+        sorted_materials = ledger_materials[order]
+        sorted_quantity = ledger_quantity[order]
+        firsts = np.flatnonzero(np.r_[True, sorted_materials[1:] != sorted_materials[:-1]])
+        lasts = np.r_[firsts[1:], len(order)] - 1
+        running = np.cumsum(sorted_quantity)
+        running -= np.repeat(running[firsts] - sorted_quantity[firsts], np.diff(np.r_[firsts, len(order)]))
+        lowest_balance[sorted_materials[firsts]] = np.minimum.reduceat(running, firsts)
+        net_movement[sorted_materials[firsts]] = running[lasts]
+        last_moved[sorted_materials[firsts]] = ledger_seconds[order][lasts]
+
+    # Materials: aim for a stock level (about 8% low), then open with whatever gets there
+    minimum = rng.integers(5, 51, material_count)
+    target = np.where(rng.random(material_count) < 0.08, rng.integers(0, minimum + 1), rng.integers(minimum + 1, 1001))
+    opening = np.maximum(target - net_movement[1:], -np.minimum(lowest_balance[1:], 0))
+    stock = opening + net_movement[1:]
+    price = np.round(rng.uniform(5, 5000, material_count), 2)
+    categories = rng.integers(0, len(CATEGORIES), material_count)
+    words = zip(rng.integers(0, len(ITEMS), material_count).tolist(),
+                rng.integers(0, len(QUALIFIERS), material_count).tolist(),
+                rng.integers(0, len(QUALIFIERS), material_count).tolist())
+    materials = {
+        'id': np.arange(1, material_count + 1),
+        'material_number': [f'MAT-{number:07d}' for number in range(1, material_count + 1)],
+        'description': [f'{ITEMS[item]} {QUALIFIERS[first]} {QUALIFIERS[second]}' for item, first, second in words],
+        'category': _labels([name for name, _ in CATEGORIES], categories),
+        'unit': _labels([unit for _, unit in CATEGORIES], categories),
+        'current_stock': stock,
+        'minimum_stock': minimum,
+        'maximum_stock': minimum * 20,
+        'unit_price': price,
+        'location': [f'WH-{number}' for number in rng.integers(1, 5, material_count).tolist()],
+        'rack_number': [f'R{number:02d}' for number in rng.integers(1, 61, material_count).tolist()],
+        'bin_number': [f'B{number:03d}' for number in rng.integers(1, 401, material_count).tolist()],
+        'supplier': _pick(rng, SUPPLIERS, material_count),
+        'last_updated': start + last_moved[1:],
+        'is_active': rng.random(material_count) > 0.02,
+        'low_stock': stock <= minimum
+    }
+
+    # Transactions: opening balances first, then every movement in date order
+    opened = np.flatnonzero(opening > 0) + 1
+    types = np.concatenate([
+        np.full(len(opened), TRANSACTION_TYPES.index('receive')),
+        np.full(issue_count, TRANSACTION_TYPES.index('issue')),
+        np.array([TRANSACTION_TYPES.index(name) for name, _, _, _, _ in MOVEMENTS])[kinds]
+    ])
+    references = (['OPENING'] * len(opened) + [f'REQ-{number}' for number in request_ids[issued].tolist()]
+                  + [f'{MOVEMENTS[kind][4]}-{number:08d}' for number, kind in enumerate(kinds.tolist(), 1)])
+    entry_purposes = np.concatenate([np.full(len(opened), len(PURPOSES)), purposes[issued], rng.integers(0, len(PURPOSES), movement_count)])
+    seconds = np.concatenate([np.zeros(len(opened), dtype=np.int64), ledger_seconds])
+    order = np.argsort(seconds, kind='stable')
+    material_ids = np.concatenate([opened, ledger_materials])[order]
+    transactions = {
+        'id': np.arange(1, len(order) + 1),
+        'material_id': material_ids,
+        'user_id': np.concatenate([
+            np.ones(len(opened), dtype=np.int64), approver[issued], rng.integers(1, user_count + 1, movement_count)
+        ])[order],
+        'transaction_type': _labels(TRANSACTION_TYPES, types[order]),
+        'quantity': np.concatenate([opening[opened - 1], ledger_quantity])[order],
+        'unit_price': price[material_ids - 1],
+        'reference_number': [references[index] for index in order.tolist()],
+        'purpose': _labels(PURPOSES + ['Opening balance'], entry_purposes[order]),
+        'transaction_date': start + seconds[order]
+    }
+
+    return {'users': users, 'materials': materials, 'material_requests': requests, 'transactions': transactions}
+
+
+def _driver_values(column, first, last):
+    values = column[first:last]
+    if not isinstance(values, np.ndarray):
+        return values
+    if values.dtype.kind == 'M':
+        seconds = values.astype('datetime64[s]').astype(np.int64).tolist()
+        if np.isnat(values).any():
+            return [None if missing else value for value, missing in zip(seconds, np.isnat(values).tolist())]
+        return seconds
+    return values.tolist()
+
+
+def bulk_insert(connection, table, columns, chunk_size=CHUNK_SIZE):
+    """Insert {column: values} into ``table`` with one executemany per chunk; returns the row count.
+
+    Rows go to the driver as plain tuples, skipping SQLAlchemy's per-row
+    parameter processing. PyMySQL and mysql-connector fold an executemany
+    INSERT into multi-row INSERT statements.
+    """
+    placeholder = '?' if connection.dialect.paramstyle == 'qmark' else '%s'
+    epoch = EPOCH_SQL[connection.dialect.name]
+    names = list(columns)
+    values = [
+        epoch.format(placeholder) if isinstance(column, np.ndarray) and column.dtype.kind == 'M' else placeholder
+        for column in columns.values()
+    ]
+    statement = f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join(values)})"
+    total = len(columns[names[0]])
+    for first in range(0, total, chunk_size):
+        rows = zip(*(_driver_values(column, first, first + chunk_size) for column in columns.values()))
+        connection.exec_driver_sql(statement, list(rows))
+    return total
@@ -142,6 +142,10 @@ else
     echo "   pip install -r requirements.txt"
 fi
 
+# Apply schema migrations (outbox, rollup, search and list-view indexes)
+echo "Applying schema migrations..."
+flask --app app db-upgrade
+
 # Test database connection
 echo "Testing database setup..."
 python3 database_test.py
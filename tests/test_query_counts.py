@@ -0,0 +1,84 @@
+"""The list views load their relationships in bulk: the SQL statements per page stay
+the same whether the page shows one row or a full page of rows."""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app import create_app, db, Material, MaterialRequest, Transaction, User
+
+ROUTES = ['/dashboard', '/requests', '/transactions', '/reports']
+
+
+def build_app(tmp_path, rows):
+    """An app on a fresh SQLite database with ``rows`` requests and transactions, each for its own material"""
+    app = create_app('testing', {
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / f'rows-{rows}.db'}",
+        'TEMPLATE_CACHE_DIR': '',
+        'METRICS_ENABLED': False
+    })
+    with app.app_context():
+        db.create_all()
+        admin = User(username='admin', email='admin@example.com', role='admin', employee_id='E0')
+        admin.password_hash = 'unused'
+        staff = [User(username=f'staff{i}', email=f'staff{i}@example.com', role='staff', employee_id=f'E{i}') for i in (1, 2)]
+        for user in staff:
+            user.password_hash = 'unused'
+        db.session.add_all([admin, *staff])
+        db.session.flush()
+
+        now = datetime.utcnow()
+        for i in range(rows):
+            material = Material(material_number=f'MAT-{i:04d}', description=f'Material {i}', category=f'C{i % 3}',
+                                current_stock=i, minimum_stock=5, unit_price=2)
+            db.session.add(material)
+            db.session.flush()
+            user = staff[i % 2]
+            db.session.add(MaterialRequest(material_id=material.id, user_id=user.id, quantity_requested=1, purpose='test',
+                                           request_date=now - timedelta(hours=i)))
+            db.session.add(Transaction(material_id=material.id, user_id=user.id, transaction_type='receive', quantity=i,
+                                       unit_price=2, transaction_date=now - timedelta(hours=i)))
+        db.session.commit()
+    return app
+
+
+def statement_counts(app):
+    """SQL statements per route, each requested with cold caches"""
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = '1'
+        session['_fresh'] = True
+
+    counts = {}
+    with app.app_context():
+        statements = {'count': 0}
+
+        def count_statement(*args):
+            statements['count'] += 1
+
+        event.listen(db.engine, 'before_cursor_execute', count_statement)
+        try:
+            for route in ROUTES:
+                client.get(route)  # warm-up: first-use imports and template compilation
+                app.extensions['abb_store']['cache'].clear()
+                app.extensions['abb_store']['user_cache'].clear()
+                statements['count'] = 0
+                response = client.get(route)
+                assert response.status_code == 200, route
+                counts[route] = statements['count']
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', count_statement)
+            db.engine.dispose()
+    return counts
+
+
+@pytest.fixture(scope='module')
+def counts(tmp_path_factory):
+    tmp_path = tmp_path_factory.mktemp('query-counts')
+    return {rows: statement_counts(build_app(tmp_path, rows)) for rows in (1, 25)}
+
+
+@pytest.mark.parametrize('route', ROUTES)
+def test_query_count_does_not_grow_with_rows(counts, route):
+    assert counts[1][route] == counts[25][route]
@@ -1,5 +1,7 @@
-from app import app
-from app import init_db
+import os
+from app import create_app, init_db
+
+app = create_app(os.getenv('FLASK_CONFIG', 'production'))
 
 if __name__ == '__main__':
     try: